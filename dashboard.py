@@ -3,10 +3,13 @@ import os
 from supabase import create_client, Client
 import pandas as pd
 from datetime import datetime, timedelta
-from woocommerce import API
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import time
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Configurare pagină
 st.set_page_config(
@@ -32,61 +35,181 @@ except Exception as e:
     st.info("Asigură-te că ai completat toate secretele în Streamlit Cloud Settings.")
     st.stop()
 
+# Clienții trăiesc o dată per proces (nu se recreează la fiecare rerun Streamlit)
+@st.cache_resource
+def get_supabase() -> Client:
+    """Client Supabase partajat între reruns și sesiuni"""
+    return create_client(SUPABASE_URL, SUPABASE_KEY)
+
+
 # Inițializare Supabase
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-
-# Inițializare WooCommerce API (READ ONLY)
-wcapi = API(
-    url=WOO_URL,
-    consumer_key=WOO_CONSUMER_KEY,
-    consumer_secret=WOO_CONSUMER_SECRET,
-    version="wc/v3",
-    timeout=30
-)
+supabase: Client = get_supabase()
+
+# Verificări Foneday în paralel (limitat ca să nu depășim rate limit-ul API)
+# Se poate ajusta din secrets fără deploy, dacă Foneday permite mai mult / mai puțin
+FONEDAY_MAX_WORKERS = max(1, int(st.secrets.get("FONEDAY_MAX_WORKERS", "8")))
+FONEDAY_MAX_RETRIES = 3
+FONEDAY_RATE_LIMIT = max(0.1, float(st.secrets.get("FONEDAY_RATE_LIMIT", "10")))  # cereri/secundă
+FONEDAY_CACHE_TTL = 3600  # secunde - catalogul complet /products se reutilizează o oră
+FONEDAY_PRODUCT_CACHE_TTL = 300  # secunde - prețul/stocul per produs trebuie să rămână aproape de timp real
+WOO_MAX_WORKERS = 4  # pagini WooCommerce citite simultan
+CART_HISTORY_BATCH_SIZE = 100  # rânduri de istoric coș per insert la Pasul 5
+FONEDAY_CART_CHUNK_SIZE = 50  # articole per POST /shopping-cart-add-items
+FONEDAY_CART_ITEM_ERRORS = (400, 404, 422)  # lot respins din cauza unui articol - se reîncearcă per articol
+FONEDAY_AUTH_ERRORS = (401, 403)  # token invalid / fără drept - nu are rost să mai trimitem nimic
+
+
+def create_http_session(headers: dict = None, auth: tuple = None) -> requests.Session:
+    """Sesiune HTTP cu keep-alive și retry cu backoff pe 429/5xx (doar metode idempotente, NU POST)"""
+    session = requests.Session()
+    retry = Retry(
+        total=FONEDAY_MAX_RETRIES,
+        backoff_factor=0.3,
+        status_forcelist=[429, 500, 502, 503, 504],
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(
+        pool_connections=FONEDAY_MAX_WORKERS,
+        pool_maxsize=FONEDAY_MAX_WORKERS * 2,
+        max_retries=retry
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    
+    if headers:
+        session.headers.update(headers)
+    if auth:
+        session.auth = auth
+    
+    return session
+
+
+@st.cache_resource
+def get_foneday_session() -> requests.Session:
+    """Sesiune Foneday partajată - pool-ul de conexiuni supraviețuiește rerun-urilor"""
+    return create_http_session(headers={
+        "Authorization": f"Bearer {FONEDAY_API_TOKEN}",
+        "Content-Type": "application/json"
+    })
+
+
+@st.cache_resource
+def get_woo_session() -> requests.Session:
+    """Sesiune WooCommerce partajată - pool-ul de conexiuni supraviețuiește rerun-urilor"""
+    return create_http_session(auth=(WOO_CONSUMER_KEY, WOO_CONSUMER_SECRET))
+
+
+# Sesiuni reutilizate (evită handshake TCP+TLS la fiecare request)
+foneday_session = get_foneday_session()
+woo_session = get_woo_session()
+
+
+class TokenBucket:
+    """Rate limiter token-bucket, thread-safe: max `rate` cereri/secundă, rafale de până la `capacity`"""
+    
+    def __init__(self, rate: float, capacity: int = None):
+        self.rate = rate
+        self.capacity = capacity or max(1, int(rate))
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        """Așteaptă doar dacă nu mai sunt tokeni (nu la fiecare cerere, ca un sleep fix)"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+@st.cache_resource
+def get_foneday_rate_limiter() -> TokenBucket:
+    """Un singur limiter per proces - limita Foneday e per token API, nu per sesiune"""
+    return TokenBucket(FONEDAY_RATE_LIMIT)
+
+
+foneday_rate_limiter = get_foneday_rate_limiter()
+
+
+# Log-urile se strâng în buffer și se scriu cu un singur insert (la 50 evenimente / 2s / final rulare)
+LOG_BUFFER_SIZE = 50
+LOG_FLUSH_INTERVAL = 2.0
+_log_buffer = []
+_log_lock = threading.Lock()
+_log_last_flush = time.monotonic()
+
+
+def flush_logs():
+    """Scrie în claude_sync_logs toate evenimentele din buffer"""
+    global _log_last_flush
+    
+    with _log_lock:
+        rows = _log_buffer[:]
+        _log_buffer.clear()
+        _log_last_flush = time.monotonic()
+    
+    if not rows:
+        return
+    
+    try:
+        supabase.table("claude_sync_logs").insert(rows, returning="minimal").execute()
+    except Exception as e:
+        print(f"Error logging: {e}")
 
 
 def log_event(event_type: str, message: str, sku: str = None, 
               product_id: str = None, status: str = "info"):
     """Salvează evenimente în log"""
-    try:
-        supabase.table("claude_sync_logs").insert({
+    with _log_lock:
+        _log_buffer.append({
             "event_type": event_type,
             "sku": sku,
             "product_id": product_id,
             "message": message,
             "status": status
-        }).execute()
-    except Exception as e:
-        print(f"Error logging: {e}")
-
+        })
+        should_flush = (
+            len(_log_buffer) >= LOG_BUFFER_SIZE
+            or time.monotonic() - _log_last_flush >= LOG_FLUSH_INTERVAL
+        )
+    
+    if should_flush:
+        flush_logs()
 
-def calculate_profit_margin(foneday_price_eur: float, woo_price_ron: float) -> float:
-    """Calculează marja de profit în procente"""
-    cost_ron = foneday_price_eur * EUR_RON_RATE
-    selling_price_without_vat = woo_price_ron / TVA_RATE
-    ratio = cost_ron / selling_price_without_vat
-    profit_margin = (1 - ratio) * 100
-    return round(profit_margin, 2)
 
+def calculate_profitability(foneday_prices_eur: list, woo_prices_ron: list) -> pd.DataFrame:
+    """Marja de profit și profitabilitatea, vectorizat pentru liste de prețuri: coloanele profit_margin și is_profitable.
 
-def is_profitable(foneday_price_eur: float, woo_price_ron: float) -> bool:
-    """Verifică dacă produsul e profitabil"""
-    cost_ron = foneday_price_eur * EUR_RON_RATE
-    selling_price_without_vat = woo_price_ron / TVA_RATE
-    ratio = cost_ron / selling_price_without_vat
-    return ratio < MIN_PROFIT_MARGIN
+    Rândurile fără preț valid (lipsă sau ≤ 0) au is_profitable=False și profit_margin NaN.
+    """
+    df = pd.DataFrame({
+        "foneday_price_eur": pd.to_numeric(pd.Series(foneday_prices_eur, dtype=object), errors="coerce"),
+        "woo_price_ron": pd.to_numeric(pd.Series(woo_prices_ron, dtype=object), errors="coerce")
+    })
+    valid = (df["foneday_price_eur"] > 0) & (df["woo_price_ron"] > 0)
+    
+    ratio = (df["foneday_price_eur"] * EUR_RON_RATE) / (df["woo_price_ron"] / TVA_RATE)
+    df["profit_margin"] = ((1 - ratio) * 100).round(2).where(valid)
+    df["is_profitable"] = valid & (ratio < MIN_PROFIT_MARGIN)
+    df["is_valid"] = valid
+    return df
 
 
 def get_foneday_product_by_sku(foneday_sku: str):
     """Obține produs din Foneday după SKU-ul lor"""
     try:
-        headers = {
-            "Authorization": f"Bearer {FONEDAY_API_TOKEN}",
-            "Content-Type": "application/json"
-        }
-        response = requests.get(
+        foneday_rate_limiter.acquire()
+        response = foneday_session.get(
             f"{FONEDAY_API_URL}/product/{foneday_sku}",
-            headers=headers,
             timeout=10
         )
         
@@ -94,87 +217,348 @@ def get_foneday_product_by_sku(foneday_sku: str):
             data = response.json()
             return data.get("product")
         return None
-    except Exception as e:
+    except Exception:
         return None
 
 
-def add_to_foneday_cart(foneday_sku: str, quantity: int, note: str = None):
-    """Adaugă produs în coșul Foneday folosind SKU-ul lor"""
-    try:
-        headers = {
-            "Authorization": f"Bearer {FONEDAY_API_TOKEN}",
-            "Content-Type": "application/json"
-        }
-        payload = {
-            "articles": [{
-                "sku": foneday_sku,
-                "quantity": quantity,
-                "note": note
-            }]
-        }
-        response = requests.post(
-            f"{FONEDAY_API_URL}/shopping-cart-add-items",
-            headers=headers,
-            json=payload,
-            timeout=10
-        )
-        
-        if response.status_code == 200:
-            return response.json()
-        return None
-    except Exception as e:
-        return None
+@st.cache_resource
+def get_foneday_response_cache() -> dict:
+    """Cache partajat între rerun-uri pentru răspunsurile Foneday (foneday_sku → (timestamp, produs))"""
+    return {}
 
 
-def get_product_info_from_catalog(sku: str):
-    """Obține informații produs din catalog (prin view)"""
-    try:
-        result = supabase.table("v_product_sku").select(
-            "product_id, is_primary"
-        ).eq("sku", sku).eq("is_primary", True).limit(1).execute()
+def get_foneday_products_by_skus(foneday_skus: list, on_progress=None) -> dict:
+    """Obține în paralel produsele Foneday pentru o listă de SKU-uri (foneday_sku → produs)"""
+    unique_skus = list(dict.fromkeys(foneday_skus))
+    results = {}
+    
+    if not unique_skus:
+        return results
+    
+    cache = get_foneday_response_cache()
+    now = time.time()
+    to_fetch = []
+    
+    for sku in unique_skus:
+        cached = cache.get(sku)
+        if cached and now - cached[0] < FONEDAY_PRODUCT_CACHE_TTL:
+            results[sku] = cached[1]
+        else:
+            to_fetch.append(sku)
+    
+    cache_hits = len(unique_skus) - len(to_fetch)
+    
+    # Progresul se raportează cel mult ~100 de ori - fiecare update e un mesaj websocket către browser
+    progress_step = max(1, len(unique_skus) // 100)
+    
+    with ThreadPoolExecutor(max_workers=FONEDAY_MAX_WORKERS) as executor:
+        futures = {executor.submit(get_foneday_product_by_sku, sku): sku for sku in to_fetch}
         
-        if result.data and len(result.data) > 0:
-            product_id = result.data[0]["product_id"]
+        # Cache-ul și callback-ul de progres rulează în thread-ul principal (Streamlit nu acceptă UI din workeri)
+        for done, future in enumerate(as_completed(futures), cache_hits + 1):
+            sku = futures[future]
+            product = future.result()
+            results[sku] = product
             
-            product_result = supabase.table("v_product").select("name").eq("id", product_id).limit(1).execute()
+            # Doar produsele în stoc intră în cache - erorile și stocul zero se reverifică
+            # la următoarea rulare, ca o re-stocare să nu fie ratată
+            if product and product.get("instock") == "Y":
+                cache[sku] = (time.time(), product)
             
-            if product_result.data and len(product_result.data) > 0:
-                return {
-                    "product_id": product_id,
-                    "name": product_result.data[0]["name"]
-                }
+            if on_progress and (done % progress_step == 0 or done == len(unique_skus)):
+                on_progress(done, len(unique_skus))
+    
+    log_event("foneday_cache", f"Cache Foneday: {cache_hits} hit, {len(to_fetch)} miss", status="info")
+    
+    return results
+
+
+def add_items_to_foneday_cart(articles: list) -> tuple:
+    """Adaugă mai multe articole (sku, quantity, note) în coșul Foneday cu un singur POST.
+
+    Pe 429 așteaptă cât cere Retry-After și retrimite (cererea refuzată nu a fost procesată).
+    Întoarce (răspuns JSON sau None, status HTTP). Status None = eroare de rețea, rezultat incert.
+    """
+    try:
+        for attempt in range(FONEDAY_MAX_RETRIES + 1):
+            foneday_rate_limiter.acquire()
+            response = foneday_session.post(
+                f"{FONEDAY_API_URL}/shopping-cart-add-items",
+                json={"articles": articles},
+                timeout=10 + len(articles) // 5
+            )
+            
+            if response.status_code != 429 or attempt == FONEDAY_MAX_RETRIES:
+                break
             
-            return {"product_id": product_id, "name": sku}
+            try:
+                wait = float(response.headers.get("Retry-After", ""))
+            except ValueError:
+                wait = 0.3 * 2 ** attempt
+            time.sleep(wait)
         
-        return None
+        if response.status_code == 200:
+            return response.json(), response.status_code
+        return None, response.status_code
+    except Exception:
+        return None, None
+
+
+def add_cart_chunk(articles: list) -> tuple:
+    """Trimite un lot de articole în coșul Foneday.
+
+    Dacă lotul e respins ca invalid (400/404/422, ex. un SKU inexistent), articolele
+    se reîncearcă unul câte unul, în paralel (limitate de foneday_rate_limiter).
+    Pe 401/403 sau 429 persistent nu se mai trimite nimic - apelantul raportează eroarea.
+    Întoarce (listă bool per articol, status HTTP al lotului).
+    """
+    cart_result, cart_status = add_items_to_foneday_cart(articles)
+    
+    if cart_result:
+        return [True] * len(articles), cart_status
+    
+    if cart_status in FONEDAY_CART_ITEM_ERRORS:
+        with ThreadPoolExecutor(max_workers=min(FONEDAY_MAX_WORKERS, len(articles))) as executor:
+            results = executor.map(lambda article: add_items_to_foneday_cart([article])[0], articles)
+            return [result is not None for result in results], cart_status
+    
+    # Autentificare / rate limit: reîncercările per articol ar eșua la fel.
+    # Eroare de rețea / server: nu știm dacă lotul a ajuns, nu riscăm dublarea.
+    return [False] * len(articles), cart_status
+
+
+def apply_filters(query, filters: dict = None):
+    """Aplică filtrele pe un query PostgREST: valoare simplă = eq, tuplu ("gt", valoare) = alt operator"""
+    for key, value in (filters or {}).items():
+        if isinstance(value, tuple):
+            operator, operand = value
+            query = getattr(query, operator)(key, operand)
+        else:
+            query = query.eq(key, value)
+    return query
+
+
+def select_in_chunks(table: str, columns: str, column: str, values: list,
+                     filters: dict = None, chunk_size: int = 200) -> list:
+    """SELECT columns FROM table WHERE column IN values - o interogare per bucată (nu per valoare).
+
+    filters: {coloană: valoare} pentru egalitate sau {coloană: ("gt", valoare)} pentru alt operator PostgREST.
+    """
+    unique_values = list(dict.fromkeys(v for v in values if v))
+    rows = []
+    
+    for i in range(0, len(unique_values), chunk_size):
+        query = supabase.table(table).select(columns).in_(column, unique_values[i:i+chunk_size])
+        result = apply_filters(query, filters).execute()
+        rows.extend(result.data or [])
+    
+    return rows
+
+
+def select_all_pages(table: str, columns: str, order_by: str, filters: dict = None, page_size: int = 1000) -> list:
+    """Citește toate rândurile unui tabel pagină cu pagină (PostgREST limitează la 1000/request).
+
+    order_by: cheie unică (ex. "sku" sau "sku,foneday_sku") - fără ORDER BY, Postgres nu garantează
+    aceeași ordine între cereri și paginile pot repeta sau sări rânduri.
+    """
+    rows = []
+    page = 0
+    
+    while True:
+        query = apply_filters(supabase.table(table).select(columns), filters).order(order_by)
+        result = query.range(page * page_size, (page + 1) * page_size - 1).execute()
+        rows.extend(result.data or [])
+        
+        if not result.data or len(result.data) < page_size:
+            break
+        page += 1
+    
+    return rows
+
+
+def get_all_primary_product_ids() -> dict:
+    """Toate SKU-urile primare din catalog, citite o singură dată (sku → product_id).
+
+    Erorile se propagă: un dict gol ar părea „niciun produs legat de catalog”.
+    """
+    rows = select_all_pages("v_product_sku", "sku, product_id", "sku,product_id", filters={"is_primary": True})
+    return {row["sku"]: row["product_id"] for row in rows}
+
+
+def get_product_names_for_skus(skus: list) -> dict:
+    """Numele produselor din catalog pentru o listă de SKU-uri primare (sku → name)"""
+    try:
+        sku_rows = select_in_chunks("v_product_sku", "sku, product_id", "sku", skus, filters={"is_primary": True})
+        product_rows = select_in_chunks("v_product", "id, name", "id", [row["product_id"] for row in sku_rows])
+        names_by_id = {row["id"]: row["name"] for row in product_rows}
+        return {row["sku"]: names_by_id.get(row["product_id"], row["sku"]) for row in sku_rows}
     except Exception as e:
-        print(f"Error in get_product_info: {e}")
-        return None
+        print(f"Error in get_product_names_for_skus: {e}")
+        return {}
 
 
-def get_all_skus_for_sku(sku: str):
-    """Obține toate SKU-urile (inclusiv secundare) pentru un SKU dat"""
+def get_foneday_catalog_stock(foneday_skus: list):
+    """Starea instock din catalogul Foneday importat la Pasul 2 (foneday_sku → instock).
+
+    instock e None când rândul e mai vechi de FONEDAY_PRODUCT_CACHE_TTL - Pasul 2 rulează rar,
+    iar o re-stocare de după import nu apare în catalog. La eroare întoarce None.
+    """
     try:
-        result = supabase.table("v_product_sku").select(
-            "product_id"
-        ).eq("sku", sku).eq("is_primary", True).limit(1).execute()
-        
-        if not result.data or len(result.data) == 0:
-            return [{"sku": sku, "is_primary": True}]
-        
-        product_id = result.data[0]["product_id"]
-        
-        all_skus_result = supabase.table("v_product_sku").select(
-            "sku, is_primary"
-        ).eq("product_id", product_id).execute()
-        
-        if all_skus_result.data:
-            return all_skus_result.data
-        
-        return [{"sku": sku, "is_primary": True}]
+        rows = select_in_chunks(
+            "claude_foneday_products", "foneday_sku, instock, last_sync_at", "foneday_sku", foneday_skus
+        )
     except Exception as e:
-        print(f"Error in get_all_skus: {e}")
-        return [{"sku": sku, "is_primary": True}]
+        print(f"Error in get_foneday_catalog_stock: {e}")
+        return None
+    
+    fresh_after = datetime.now() - timedelta(seconds=FONEDAY_PRODUCT_CACHE_TTL)
+    catalog_stock = {}
+    for row in rows:
+        try:
+            synced_at = datetime.fromisoformat(row.get("last_sync_at") or "")
+            if synced_at.tzinfo is not None:
+                synced_at = synced_at.astimezone().replace(tzinfo=None)
+        except ValueError:
+            synced_at = None
+        
+        catalog_stock[row["foneday_sku"]] = row["instock"] if synced_at and synced_at >= fresh_after else None
+    return catalog_stock
+
+
+def needs_live_check(catalog_stock, foneday_sku: str) -> bool:
+    """Dacă un foneday_sku merită verificat live, după catalogul din get_foneday_catalog_stock.
+
+    Lipsă din catalog = exclus. Rând proaspăt = se crede instock. Rând vechi sau catalog
+    indisponibil (None) = se verifică live.
+    """
+    if catalog_stock is None:
+        return True
+    if foneday_sku not in catalog_stock:
+        return False
+    return catalog_stock[foneday_sku] in (None, "Y")
+
+
+def build_woo_batches(items: list, product_ids: dict, existing_stock: dict, existing_prices: dict,
+                      synced_at: str) -> tuple:
+    """Rândurile de stoc + preț pentru produse WooCommerce, calculate vectorizat cu pandas.
+
+    Se întorc doar rândurile noi sau modificate față de existing_stock / existing_prices:
+    (batch_stock, batch_price, nr. prețuri invalide, nr. produse neschimbate).
+    """
+    df = pd.DataFrame.from_records(
+        [(item.get("sku"), item.get("stock_quantity"), item.get("regular_price"), item.get("id")) for item in items],
+        columns=["sku", "stock_quantity", "regular_price", "woo_product_id"]
+    )
+    df["sku"] = df["sku"].fillna("").astype(str).str.strip()
+    df = df[df["sku"] != ""].drop_duplicates("sku", keep="last").copy()
+    
+    # Preț lipsă/gol = 0 (ca înainte); un preț care nu e număr se numără ca eroare
+    price_raw = df["regular_price"]
+    df["regular_price"] = pd.to_numeric(price_raw.where(price_raw.astype(bool), 0), errors="coerce")
+    invalid = df["regular_price"].isna()
+    df = df[~invalid].copy()
+    
+    df["stock_quantity"] = pd.to_numeric(df["stock_quantity"], errors="coerce").fillna(0).astype(int)
+    # SKU lipsă din catalog: se păstrează legătura deja salvată, nu se înlocuiește cu None
+    df["product_id"] = pd.Series([
+        product_ids.get(sku)
+        or (existing_stock.get(sku) or (None, None, None))[2]
+        or (existing_prices.get(sku) or (None, None, None))[2]
+        for sku in df["sku"]
+    ], index=df.index, dtype=object)
+    df["last_sync_at"] = synced_at
+    
+    stock_changed = pd.Series([
+        existing_stock.get(sku) != (stock, woo_id, product_id)
+        for sku, stock, woo_id, product_id in zip(df["sku"], df["stock_quantity"], df["woo_product_id"], df["product_id"])
+    ], index=df.index, dtype=bool)
+    price_changed = pd.Series([
+        existing_prices.get(sku) != (price, woo_id, product_id)
+        for sku, price, woo_id, product_id in zip(df["sku"], df["regular_price"], df["woo_product_id"], df["product_id"])
+    ], index=df.index, dtype=bool)
+    
+    batch_stock = df.loc[stock_changed, ["sku", "stock_quantity", "woo_product_id", "product_id", "last_sync_at"]].to_dict("records")
+    batch_price = df.loc[price_changed, ["sku", "regular_price", "woo_product_id", "product_id", "last_sync_at"]].to_dict("records")
+    unchanged = int((~stock_changed & ~price_changed).sum())
+    
+    return batch_stock, batch_price, int(invalid.sum()), unchanged
+
+
+def save_woo_batch(batch_stock: list, batch_price: list) -> int:
+    """UPSERT stoc + prețuri WooCommerce pentru un batch; întoarce nr. de produse salvate"""
+    # Rândurile fără product_id cunoscut pleacă separat și fără coloana product_id,
+    # ca upsert-ul să nu scrie NULL peste o legătură de catalog existentă
+    groups = []
+    for table, rows in (("claude_woo_stock", batch_stock), ("claude_woo_prices", batch_price)):
+        groups.append((table, [row for row in rows if row["product_id"] is not None]))
+        groups.append((table, [
+            {key: value for key, value in row.items() if key != "product_id"}
+            for row in rows if row["product_id"] is None
+        ]))
+    
+    # Tabelele sunt independente - upsert-urile pleacă în paralel
+    with ThreadPoolExecutor(max_workers=len(groups)) as executor:
+        futures = [
+            executor.submit(supabase.table(table).upsert(rows, on_conflict="sku", returning="minimal").execute)
+            for table, rows in groups
+            if rows
+        ]
+        for future in futures:
+            future.result()
+    return len({row["sku"] for row in batch_stock + batch_price})
+
+
+def iter_woo_pages(path: str, params: dict, max_pages: int):
+    """Citește paginile unui endpoint WooCommerce și le întoarce în ordine ca (page, items).
+
+    Pagina 1 dă X-WP-TotalPages; restul paginilor se citesc în paralel (max WOO_MAX_WORKERS).
+    Fără header, se citește secvențial până la prima pagină goală.
+    """
+    def fetch_page(page: int) -> requests.Response:
+        response = woo_session.get(
+            f"{WOO_URL}/wp-json/wc/v3/{path}",
+            params={**params, "page": page},
+            timeout=30
+        )
+        if response.status_code != 200:
+            raise RuntimeError(f"Eroare API pagina {page}: {response.status_code}")
+        return response
+    
+    first = fetch_page(1)
+    items = first.json()
+    if not items:
+        return
+    yield 1, items
+    
+    total_pages = first.headers.get("X-WP-TotalPages")
+    
+    if total_pages is None:
+        for page in range(2, max_pages + 1):
+            items = fetch_page(page).json()
+            if not items:
+                return
+            yield page, items
+        return
+    
+    pages = range(2, min(int(total_pages), max_pages) + 1)
+    executor = ThreadPoolExecutor(max_workers=WOO_MAX_WORKERS)
+    try:
+        futures = [executor.submit(fetch_page, page) for page in pages]
+        for page, future in zip(pages, futures):
+            items = future.result().json()
+            if not items:
+                return
+            yield page, items
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def fetch_woo_variations(woo_product_id: int) -> list:
+    """Toate variațiile unui produs variabil WooCommerce (max 10 pagini)"""
+    variations = []
+    for _, items in iter_woo_pages(f"products/{woo_product_id}/variations", {"per_page": 100}, 10):
+        variations.extend(items)
+    return variations
 
 
 # ============ PASUL 1: HIBRID - Cel mai bun din ambele ============
@@ -186,6 +570,7 @@ def step1_import_woocommerce():
     total_simple = 0
     total_variations = 0
     total_errors = 0
+    total_unchanged = 0
     max_pages = 100
     
     progress_bar = st.progress(0)
@@ -193,252 +578,272 @@ def step1_import_woocommerce():
     
     log_event("step1_start", "PASUL 1: Start sincronizare WooCommerce", status="info")
     
+    # Un singur timestamp pentru toată sincronizarea - rândurile aceleiași rulări se pot identifica
+    synced_at = datetime.now().isoformat()
+    
+    # Salvarea în Supabase a paginii N rulează în fundal cât timp se citește pagina N+1 din WooCommerce
+    save_executor = ThreadPoolExecutor(max_workers=1)
+    pending_save = None
+    failed_skus = []  # SKU-urile din batch-urile care nu s-au salvat (pentru reluare/inspecție)
+    
+    def wait_for_pending_save() -> int:
+        """Așteaptă salvarea din fundal și întoarce nr. de produse salvate"""
+        nonlocal pending_save, total_errors
+        
+        if pending_save is None:
+            return 0
+        
+        label, future, skus = pending_save
+        pending_save = None
+        
+        try:
+            return future.result()
+        except Exception as e:
+            log_event("step1_error", f"Eroare salvare {label}: {e}", status="error")
+            total_errors += 1
+            failed_skus.extend(skus)
+            return 0
+    
+    # product_id din catalog + starea curentă din Supabase - un singur prefetch pentru toate paginile.
+    # Rândurile identice cu ce e deja salvat nu se mai rescriu.
+    status_container.info("📂 Citesc catalogul și stocurile/prețurile existente...")
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        product_ids_future = executor.submit(get_all_primary_product_ids)
+        stock_future = executor.submit(select_all_pages, "claude_woo_stock", "sku, stock_quantity, woo_product_id, product_id", "sku")
+        prices_future = executor.submit(select_all_pages, "claude_woo_prices", "sku, regular_price, woo_product_id, product_id", "sku")
+        
+        try:
+            product_ids = product_ids_future.result()
+        except Exception as e:
+            # Fără catalog, fiecare rând ar pierde product_id - PASUL 1 nu continuă
+            log_event("step1_error", f"Eroare citire catalog v_product_sku (PASUL 1 oprit): {e}", status="error")
+            progress_bar.empty()
+            status_container.empty()
+            save_executor.shutdown()
+            st.error(f"❌ PASUL 1 oprit: nu am putut citi catalogul ({e})")
+            return 0, 0, 0, 1
+        
+        try:
+            existing_stock = {
+                row["sku"]: (row.get("stock_quantity"), row.get("woo_product_id"), row.get("product_id"))
+                for row in stock_future.result()
+            }
+            existing_prices = {
+                row["sku"]: (float(row.get("regular_price") or 0), row.get("woo_product_id"), row.get("product_id"))
+                for row in prices_future.result()
+            }
+        except Exception as e:
+            log_event("step1_error", f"Eroare citire stare existentă (se salvează tot): {e}", status="error")
+            existing_stock = {}
+            existing_prices = {}
+    
     # FAZA 1: Produse simple/externe/grouped
     status_container.info("📥 FAZA 1: Citesc produse simple...")
     
-    while page <= max_pages:
-        try:
-            status_container.info(f"📥 Citesc pagina {page} (simple)...")
-            
-            # Requests direct (mai rapid decât wcapi)
-            response = requests.get(
-                f"{WOO_URL}/wp-json/wc/v3/products",
-                auth=(WOO_CONSUMER_KEY, WOO_CONSUMER_SECRET),
-                params={
-                    "per_page": per_page, 
-                    "page": page,
-                    "status": "publish"
-                },
-                timeout=30
-            )
-            
-            if response.status_code != 200:
-                log_event("step1_error", f"Eroare API pagina {page}: {response.status_code}", status="error")
-                break
-            
-            products = response.json()
-            
-            if not products or len(products) == 0:
-                break
+    try:
+        # Requests direct prin woo_session, paginile se citesc în paralel
+        for page, products in iter_woo_pages("products", {"per_page": per_page, "status": "publish"}, max_pages):
+            status_container.info(f"📥 Procesez pagina {page} (simple)...")
             
             # Filtrează doar simple, external, grouped (NU variable)
             simple_products = [p for p in products if p.get('type') in ['simple', 'external', 'grouped']]
             
             # Procesează și salvează IMEDIAT
             if simple_products:
-                batch_stock = []
-                batch_price = []
-                
-                for product in simple_products:
-                    try:
-                        sku = product.get("sku", "").strip()
-                        if not sku:
-                            continue
-                        
-                        product_info = get_product_info_from_catalog(sku)
-                        product_id = product_info["product_id"] if product_info else None
-                        
-                        stock_quantity = product.get("stock_quantity", 0)
-                        regular_price = product.get("regular_price", "0")
-                        woo_product_id = product.get("id")
-                        
-                        current_stock = stock_quantity if stock_quantity is not None else 0
-                        current_price = float(regular_price) if regular_price else 0
-                        
-                        stock_data = {
-                            "sku": sku,
-                            "stock_quantity": current_stock,
-                            "woo_product_id": woo_product_id,
-                            "last_sync_at": datetime.now().isoformat()
-                        }
-                        if product_id:
-                            stock_data["product_id"] = product_id
-                        
-                        batch_stock.append(stock_data)
-                        
-                        price_data = {
-                            "sku": sku,
-                            "regular_price": current_price,
-                            "woo_product_id": woo_product_id,
-                            "last_sync_at": datetime.now().isoformat()
-                        }
-                        if product_id:
-                            price_data["product_id"] = product_id
-                        
-                        batch_price.append(price_data)
-                        
-                    except Exception as e:
-                        total_errors += 1
-                        continue
+                batch_stock, batch_price, invalid, unchanged = build_woo_batches(
+                    simple_products, product_ids, existing_stock, existing_prices, synced_at
+                )
+                total_errors += invalid
+                total_unchanged += unchanged
                 
-                # UPSERT imediat
-                if batch_stock:
-                    try:
-                        status_container.warning(f"💾 Salvez {len(batch_stock)} produse simple...")
-                        
-                        supabase.table("claude_woo_stock").upsert(batch_stock, on_conflict="sku").execute()
-                        supabase.table("claude_woo_prices").upsert(batch_price, on_conflict="sku").execute()
-                        
-                        total_simple += len(batch_stock)
-                        log_event("step1_process", f"Pagina {page}: {len(batch_stock)} simple. Total: {total_simple}", status="info")
-                        
-                    except Exception as e:
-                        log_event("step1_error", f"Eroare salvare pagina {page}: {e}", status="error")
-                        total_errors += 1
+                # UPSERT în fundal (pagina anterioară trebuie să fi terminat)
+                if batch_stock or batch_price:
+                    total_simple += wait_for_pending_save()
+                    status_container.warning(f"💾 Salvez {len(batch_stock)} stocuri / {len(batch_price)} prețuri modificate...")
+                    
+                    batch_skus = list(dict.fromkeys(row["sku"] for row in batch_stock + batch_price))
+                    pending_save = (f"pagina {page}", save_executor.submit(save_woo_batch, batch_stock, batch_price), batch_skus)
+                    log_event("step1_process", f"Pagina {page}: {len(batch_skus)} simple modificate, {unchanged} neschimbate", status="info")
             
             progress_bar.progress(min(0.5 * (page / max_pages), 0.49))
-            page += 1
-            time.sleep(0.3)
             
-        except Exception as e:
-            log_event("step1_error", f"Eroare critică pagina {page}: {e}", status="error")
-            break
+    except Exception as e:
+        log_event("step1_error", f"Eroare critică pagina {page}: {e}", status="error")
+    
+    total_simple += wait_for_pending_save()
     
     # FAZA 2: Variații (dacă ai produse variabile)
     status_container.info("🔄 FAZA 2: Citesc produse variabile...")
     
     try:
         # Găsește toate produsele variabile
-        page_var = 1
         variable_products = []
         
-        while page_var <= 20:  # Max 20 pagini de variabile
-            response = requests.get(
-                f"{WOO_URL}/wp-json/wc/v3/products",
-                auth=(WOO_CONSUMER_KEY, WOO_CONSUMER_SECRET),
-                params={
-                    "per_page": 100,
-                    "page": page_var,
-                    "type": "variable",
-                    "status": "publish"
-                },
-                timeout=30
-            )
-            
-            if response.status_code != 200:
-                break
-            
-            vars = response.json()
-            if not vars:
-                break
-            
+        # Max 20 pagini de variabile
+        for page_var, vars in iter_woo_pages("products", {"per_page": 100, "type": "variable", "status": "publish"}, 20):
             variable_products.extend(vars)
-            page_var += 1
-            time.sleep(0.2)
         
         if variable_products:
             status_container.info(f"🔄 Procesez {len(variable_products)} produse variabile...")
             log_event("step1_process", f"Găsite {len(variable_products)} produse variabile", status="info")
             
-            for idx, vp in enumerate(variable_products, 1):
-                vpage = 1
+            # Variațiile produselor se citesc în paralel, procesarea rămâne pe firul principal
+            variations_executor = ThreadPoolExecutor(max_workers=WOO_MAX_WORKERS)
+            futures = {variations_executor.submit(fetch_woo_variations, vp["id"]): vp for vp in variable_products}
+            
+            for idx, future in enumerate(as_completed(futures), 1):
+                vp = futures[future]
                 
-                while vpage <= 10:  # Max 10 pagini de variații per produs
-                    try:
-                        vr = requests.get(
-                            f"{WOO_URL}/wp-json/wc/v3/products/{vp['id']}/variations",
-                            auth=(WOO_CONSUMER_KEY, WOO_CONSUMER_SECRET),
-                            params={"per_page": 100, "page": vpage},
-                            timeout=30
+                try:
+                    variations = future.result()
+                    
+                    if variations:
+                        batch_stock, batch_price, invalid, unchanged = build_woo_batches(
+                            variations, product_ids, existing_stock, existing_prices, synced_at
                         )
+                        total_errors += invalid
+                        total_unchanged += unchanged
                         
-                        if vr.status_code != 200:
-                            break
+                        # UPSERT variațiile în fundal
+                        if batch_stock or batch_price:
+                            total_variations += wait_for_pending_save()
+                            batch_skus = list(dict.fromkeys(row["sku"] for row in batch_stock + batch_price))
+                            pending_save = (f"variații produs {vp['id']}", save_executor.submit(save_woo_batch, batch_stock, batch_price), batch_skus)
                         
-                        variations = vr.json()
-                        if not variations:
-                            break
-                        
-                        # Procesează variațiile
-                        batch_stock = []
-                        batch_price = []
-                        
-                        for var in variations:
-                            try:
-                                sku = var.get("sku", "").strip()
-                                if not sku:
-                                    continue
-                                
-                                product_info = get_product_info_from_catalog(sku)
-                                product_id = product_info["product_id"] if product_info else None
-                                
-                                stock_quantity = var.get("stock_quantity", 0)
-                                regular_price = var.get("regular_price", "0")
-                                woo_product_id = var.get("id")
-                                
-                                current_stock = stock_quantity if stock_quantity is not None else 0
-                                current_price = float(regular_price) if regular_price else 0
-                                
-                                stock_data = {
-                                    "sku": sku,
-                                    "stock_quantity": current_stock,
-                                    "woo_product_id": woo_product_id,
-                                    "last_sync_at": datetime.now().isoformat()
-                                }
-                                if product_id:
-                                    stock_data["product_id"] = product_id
-                                
-                                batch_stock.append(stock_data)
-                                
-                                price_data = {
-                                    "sku": sku,
-                                    "regular_price": current_price,
-                                    "woo_product_id": woo_product_id,
-                                    "last_sync_at": datetime.now().isoformat()
-                                }
-                                if product_id:
-                                    price_data["product_id"] = product_id
-                                
-                                batch_price.append(price_data)
-                                
-                            except Exception as e:
-                                total_errors += 1
-                                continue
-                        
-                        # UPSERT variațiile
-                        if batch_stock:
-                            try:
-                                supabase.table("claude_woo_stock").upsert(batch_stock, on_conflict="sku").execute()
-                                supabase.table("claude_woo_prices").upsert(batch_price, on_conflict="sku").execute()
-                                
-                                total_variations += len(batch_stock)
-                                
-                            except Exception as e:
-                                log_event("step1_error", f"Eroare salvare variații: {e}", status="error")
-                                total_errors += 1
-                        
-                        vpage += 1
-                        time.sleep(0.1)
-                        
-                    except Exception as e:
-                        log_event("step1_error", f"Eroare variații produs {vp['id']}: {e}", status="error")
-                        break
+                except Exception as e:
+                    log_event("step1_error", f"Eroare variații produs {vp['id']}: {e}", status="error")
                 
                 if idx % 10 == 0:
                     status_container.info(f"🔄 {idx}/{len(variable_products)} variabile procesate ({total_variations} variații)")
                     progress_bar.progress(0.5 + (0.5 * (idx / len(variable_products))))
+            
+            variations_executor.shutdown()
         
     except Exception as e:
         log_event("step1_error", f"Eroare procesare variabile: {e}", status="error")
     
+    total_variations += wait_for_pending_save()
+    save_executor.shutdown()
+    
     progress_bar.progress(1.0)
     status_container.empty()
     
     total_products = total_simple + total_variations
-    success_msg = f"PASUL 1 complet: {total_products} produse ({total_simple} simple + {total_variations} variații), {total_errors} erori"
+    success_msg = f"PASUL 1 complet: {total_products} produse ({total_simple} simple + {total_variations} variații), {total_unchanged} neschimbate, {total_errors} erori"
     log_event("step1_complete", success_msg, status="success")
     
     st.success(f"""
     ✅ **PASUL 1 FINALIZAT:**
     - 📦 {total_simple} produse simple sincronizate
     - 🔄 {total_variations} variații sincronizate
-    - 📊 **Total: {total_products} produse**
+    - 📊 **Total: {total_products} produse actualizate**
+    - ⏭️ {total_unchanged} produse neschimbate (nu s-au rescris)
     - ❌ {total_errors} erori
     """)
     
+    if failed_skus:
+        log_event("step1_error", f"{len(failed_skus)} SKU-uri nesalvate: {', '.join(failed_skus[:50])}", status="error")
+        with st.expander(f"⚠️ {len(failed_skus)} SKU-uri nesalvate (rulează din nou PASUL 1)"):
+            st.write(", ".join(failed_skus))
+    
     return total_products, total_simple, total_variations, total_errors
 
 
+class FonedayAPIError(Exception):
+    """Răspuns non-200 de la API-ul Foneday"""
+
+
+@st.cache_data(ttl=FONEDAY_CACHE_TTL, show_spinner=False)
+def fetch_foneday_catalog() -> list:
+    """Tot catalogul Foneday (/products), reutilizat o oră între rulări (golit de butonul „🔄 Reîmprospătare”)"""
+    foneday_rate_limiter.acquire()
+    response = foneday_session.get(
+        f"{FONEDAY_API_URL}/products",
+        timeout=60
+    )
+    
+    if response.status_code != 200:
+        raise FonedayAPIError(f"Eroare API Foneday: {response.status_code}")
+    
+    return response.json().get("products", [])
+
+
+def parse_artcode_list(artcode_raw) -> list:
+    """Valorile din câmpul artcode Foneday (listă, listă JSON sau valoare simplă)"""
+    if not artcode_raw:
+        return []
+    if isinstance(artcode_raw, list):
+        return artcode_raw
+    if isinstance(artcode_raw, str):
+        try:
+            parsed = json.loads(artcode_raw)
+        except ValueError:
+            return [artcode_raw.strip()]
+        return parsed if isinstance(parsed, list) else [parsed]
+    return [artcode_raw]
+
+
+def normalize_foneday_artcodes(products: list) -> pd.DataFrame:
+    """Perechi (foneday_sku, artcode) pentru tot catalogul, curățate și fără duplicate.
+
+    Indexul rămâne poziția produsului în `products`, ca să poată fi împărțit pe batch-uri.
+    """
+    df = pd.DataFrame.from_records(products, columns=["sku", "artcode"])
+    df = df[df["sku"].notna()].copy()
+    
+    df["artcode"] = df["artcode"].map(parse_artcode_list)
+    artcodes = df.explode("artcode").dropna(subset=["artcode"])
+    
+    artcodes["artcode"] = artcodes["artcode"].astype(str).str.strip().str.strip('"').str.strip("'")
+    artcodes = artcodes[artcodes["artcode"] != ""].drop_duplicates(["sku", "artcode"])
+    
+    return artcodes.rename(columns={"sku": "foneday_sku"})
+
+
+STEP2_RETRY_BATCH_SIZE = 100  # la un batch respins, se reîncearcă în bucăți de această mărime
+
+
+def upsert_foneday_rows(table: str, rows: list, on_conflict: str, label: str) -> int:
+    """UPSERT cu fallback: dacă tot batch-ul e respins, se reîncearcă în bucăți de STEP2_RETRY_BATCH_SIZE.
+
+    Un rând invalid pierde astfel doar bucata lui, nu tot batch-ul. Întoarce nr. de rânduri salvate.
+    """
+    if not rows:
+        return 0
+    
+    try:
+        supabase.table(table).upsert(rows, on_conflict=on_conflict, returning="minimal").execute()
+        return len(rows)
+    except Exception as e:
+        if len(rows) <= STEP2_RETRY_BATCH_SIZE:
+            log_event("step2_error", f"Eroare salvare {label} ({len(rows)} rânduri): {e}", status="error")
+            return 0
+        log_event("step2_warning", f"Batch {label} respins, reîncerc în bucăți de {STEP2_RETRY_BATCH_SIZE}: {e}", status="warning")
+    
+    saved = 0
+    for start in range(0, len(rows), STEP2_RETRY_BATCH_SIZE):
+        chunk = rows[start:start + STEP2_RETRY_BATCH_SIZE]
+        try:
+            supabase.table(table).upsert(chunk, on_conflict=on_conflict, returning="minimal").execute()
+            saved += len(chunk)
+        except Exception as e:
+            log_event("step2_error", f"Eroare salvare {label} ({len(chunk)} rânduri): {e}", status="error")
+    return saved
+
+
+def save_foneday_batch(batch_data: list, batch_artcodes: list) -> tuple:
+    """UPSERT produse + artcodes Foneday pentru un batch; întoarce (produse salvate, artcodes salvate)"""
+    # Tabelele sunt independente - cele două upsert-uri pleacă în paralel
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        products_future = executor.submit(
+            upsert_foneday_rows, "claude_foneday_products", batch_data, "foneday_sku", "produse"
+        )
+        artcodes_future = executor.submit(
+            upsert_foneday_rows, "claude_foneday_artcodes_normalized", batch_artcodes, "foneday_sku,artcode", "artcodes"
+        )
+        return products_future.result(), artcodes_future.result()
+
+
 # ============ PASUL 2: Import + Normalizare artcode ============
 def step2_import_foneday_all_products():
     """PASUL 2: Import toate produsele din Foneday + normalizare artcode"""
@@ -448,29 +853,19 @@ def step2_import_foneday_all_products():
     
     log_event("step2_start", "PASUL 2: Începe import complet Foneday", status="info")
     
+    synced_at = datetime.now().isoformat()
+    
     status_container.info("🌐 PASUL 2: Citesc TOATE produsele din Foneday...")
     
     try:
-        headers = {
-            "Authorization": f"Bearer {FONEDAY_API_TOKEN}",
-            "Content-Type": "application/json"
-        }
-        
-        response = requests.get(
-            f"{FONEDAY_API_URL}/products",
-            headers=headers,
-            timeout=60
-        )
-        
-        if response.status_code != 200:
-            error_msg = f"Eroare API Foneday: {response.status_code}"
+        try:
+            products = fetch_foneday_catalog()
+        except FonedayAPIError as e:
+            error_msg = str(e)
             st.error(f"❌ {error_msg}")
             log_event("step2_error", error_msg, status="error")
             return 0
         
-        data = response.json()
-        products = data.get("products", [])
-        
         if not products:
             st.warning("⚠️ Nu s-au găsit produse în Foneday")
             log_event("step2_warning", "Nu s-au găsit produse în Foneday", status="warning")
@@ -478,25 +873,27 @@ def step2_import_foneday_all_products():
         
         status_container.success(f"✅ Găsite {len(products)} produse în Foneday")
         log_event("step2_process", f"Procesez {len(products)} produse Foneday", status="info")
-        time.sleep(1)
         
-        batch_size = 100
+        batch_size = 1000
         total_saved = 0
         total_artcodes_normalized = 0
         
+        # Normalizarea artcode se face o singură dată, vectorizat, pe tot catalogul
+        all_artcodes = normalize_foneday_artcodes(products)
+        
+        # Batch-ul N se salvează în fundal cât timp se pregătește batch-ul N+1
+        save_executor = ThreadPoolExecutor(max_workers=1)
+        pending_save = None
+        
         for i in range(0, len(products), batch_size):
             batch = products[i:i+batch_size]
             batch_data = []
-            batch_artcodes = []
             
             for product in batch:
                 try:
-                    foneday_sku = product.get("sku")
-                    artcode_raw = product.get("artcode")
-                    
                     batch_data.append({
-                        "foneday_sku": foneday_sku,
-                        "artcode": artcode_raw,
+                        "foneday_sku": product.get("sku"),
+                        "artcode": product.get("artcode"),
                         "ean": product.get("ean"),
                         "title": product.get("title"),
                         "instock": product.get("instock"),
@@ -507,57 +904,33 @@ def step2_import_foneday_all_products():
                         "model_brand": product.get("model_brand"),
                         "model_codes": product.get("model_codes"),
                         "price_eur": float(product.get("price", 0)) if product.get("price") else None,
-                        "last_sync_at": datetime.now().isoformat()
+                        "last_sync_at": synced_at
                     })
-                    
-                    if artcode_raw:
-                        artcodes_list = []
-                        
-                        if isinstance(artcode_raw, str):
-                            try:
-                                artcodes_list = json.loads(artcode_raw)
-                            except:
-                                artcodes_list = [artcode_raw.strip()]
-                        elif isinstance(artcode_raw, list):
-                            artcodes_list = artcode_raw
-                        else:
-                            artcodes_list = [str(artcode_raw)]
-                        
-                        for artcode_value in artcodes_list:
-                            artcode_clean = str(artcode_value).strip().strip('"').strip("'")
-                            if artcode_clean:
-                                batch_artcodes.append({
-                                    "foneday_sku": foneday_sku,
-                                    "artcode": artcode_clean
-                                })
-                
                 except Exception as e:
                     log_event("step2_error", f"Eroare procesare produs Foneday: {e}", status="error")
                     continue
             
-            if batch_data:
-                try:
-                    supabase.table("claude_foneday_products").upsert(
-                        batch_data,
-                        on_conflict="foneday_sku"
-                    ).execute()
-                    total_saved += len(batch_data)
-                except Exception as e:
-                    log_event("step2_error", f"Eroare salvare produse: {e}", status="error")
+            # Același foneday_sku de două ori în upsert respinge tot batch-ul - rămâne ultima apariție
+            batch_data = list({row["foneday_sku"]: row for row in batch_data if row["foneday_sku"]}.values())
             
-            if batch_artcodes:
-                try:
-                    supabase.table("claude_foneday_artcodes_normalized").upsert(
-                        batch_artcodes,
-                        on_conflict="foneday_sku,artcode"
-                    ).execute()
-                    total_artcodes_normalized += len(batch_artcodes)
-                except Exception as e:
-                    log_event("step2_error", f"Eroare salvare artcodes: {e}", status="error")
+            batch_artcodes = all_artcodes.loc[i:i + batch_size - 1].to_dict("records")
+            
+            if pending_save is not None:
+                saved, artcodes_saved = pending_save.result()
+                total_saved += saved
+                total_artcodes_normalized += artcodes_saved
+            
+            pending_save = save_executor.submit(save_foneday_batch, batch_data, batch_artcodes)
             
             status_container.info(f"💾 Salvate {total_saved}/{len(products)} produse, {total_artcodes_normalized} artcodes...")
             progress_bar.progress(total_saved / len(products))
         
+        if pending_save is not None:
+            saved, artcodes_saved = pending_save.result()
+            total_saved += saved
+            total_artcodes_normalized += artcodes_saved
+        save_executor.shutdown()
+        
         progress_bar.progress(1.0)
         status_container.empty()
         
@@ -589,30 +962,14 @@ def step3_map_sku_to_artcode():
     log_event("step3_start", "PASUL 3: Începe mapare SKU → artcode", status="info")
     
     try:
-        status_container.info("📂 PASUL 3: Citesc toate SKU-urile din catalog...")
-        
-        all_my_skus = []
-        page_size = 1000
-        page = 0
+        status_container.info("📂 PASUL 3: Citesc SKU-urile din catalog și artcode-urile Foneday...")
         
-        while True:
-            result = supabase.table("v_product_sku").select(
-                "sku, product_id"
-            ).eq("is_primary", True).range(
-                page * page_size, 
-                (page + 1) * page_size - 1
-            ).execute()
-            
-            if not result.data or len(result.data) == 0:
-                break
-            
-            all_my_skus.extend(result.data)
-            page += 1
-            
-            status_container.info(f"📂 Citite {len(all_my_skus)} SKU-uri din catalog...")
-            
-            if len(result.data) < page_size:
-                break
+        # Cele două liste sunt independente - se citesc în paralel
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            skus_future = executor.submit(select_all_pages, "v_product_sku", "sku, product_id", "sku,product_id", {"is_primary": True})
+            artcodes_future = executor.submit(select_all_pages, "claude_foneday_artcodes_normalized", "foneday_sku, artcode", "foneday_sku,artcode")
+            all_my_skus = skus_future.result()
+            all_artcodes = artcodes_future.result()
         
         if not all_my_skus:
             st.warning("Nu există SKU-uri de mapat")
@@ -623,30 +980,6 @@ def step3_map_sku_to_artcode():
         log_event("step3_process", f"Procesez {len(all_my_skus)} SKU-uri", status="info")
         progress_bar.progress(0.3)
         
-        status_container.info("📂 Citesc toate artcode-urile Foneday...")
-        
-        all_artcodes = []
-        page = 0
-        
-        while True:
-            result = supabase.table("claude_foneday_artcodes_normalized").select(
-                "*"
-            ).range(
-                page * page_size, 
-                (page + 1) * page_size - 1
-            ).execute()
-            
-            if not result.data or len(result.data) == 0:
-                break
-            
-            all_artcodes.extend(result.data)
-            page += 1
-            
-            status_container.info(f"📂 Citite {len(all_artcodes)} artcode-uri Foneday...")
-            
-            if len(result.data) < page_size:
-                break
-        
         if not all_artcodes:
             st.warning("Nu există artcode-uri Foneday")
             log_event("step3_warning", "Nu există artcode-uri Foneday", status="warning")
@@ -669,6 +1002,7 @@ def step3_map_sku_to_artcode():
             })
         
         batch_mappings = []
+        verified_at = datetime.now().isoformat()
         for sku_item in all_my_skus:
             my_sku = sku_item["sku"]
             product_id = sku_item["product_id"]
@@ -681,7 +1015,7 @@ def step3_map_sku_to_artcode():
                         "foneday_sku": foneday_match["foneday_sku"],
                         "product_id": product_id,
                         "mapping_score": 100,
-                        "last_verified_at": datetime.now().isoformat()
+                        "last_verified_at": verified_at
                     })
         
         status_container.success(f"✅ Create {len(batch_mappings)} mapări în memorie")
@@ -704,7 +1038,8 @@ def step3_map_sku_to_artcode():
             try:
                 supabase.table("claude_sku_artcode_mapping").upsert(
                     batch,
-                    on_conflict="my_sku,foneday_artcode"
+                    on_conflict="my_sku,foneday_artcode",
+                    returning="minimal"
                 ).execute()
                 total_saved += len(batch)
                 status_container.info(f"💾 Salvate {total_saved}/{len(batch_mappings)} mapări...")
@@ -719,7 +1054,10 @@ def step3_map_sku_to_artcode():
         progress_bar.progress(1.0)
         status_container.empty()
         
-        final_count = supabase.table("claude_sku_artcode_mapping").select("*", count="exact").execute()
+        # Pagina Mapări trebuie să vadă imediat mapările noi
+        get_recent_mappings.clear()
+        
+        final_count = supabase.table("claude_sku_artcode_mapping").select("my_sku", count="exact").limit(1).execute()
         total_in_db = final_count.count if final_count.count else 0
         
         success_msg = f"PASUL 3 complet: {total_saved} mapări salvate, {total_in_db} total în DB"
@@ -753,13 +1091,18 @@ def step4_check_stock_and_prices():
     
     status_container.info("🔍 PASUL 4: Găsesc produse cu stoc zero (exclude comenzi în tranzit și recent livrate)...")
     
-    pending_orders = supabase.table("claude_foneday_orders_pending").select("sku, quantity, status, updated_at").in_("status", ["pending", "delivered"]).execute()
+    # Comenzile livrate demult nu mai contează - le filtrăm direct în Supabase
+    # (marjă de o zi pentru fus orar; verificarea exactă de 7 zile rămâne mai jos)
+    delivered_cutoff = (datetime.now() - timedelta(days=8)).isoformat()
+    pending_orders = supabase.table("claude_foneday_orders_pending").select("sku, quantity, status, updated_at").eq("status", "pending").execute()
+    delivered_orders = supabase.table("claude_foneday_orders_pending").select("sku, quantity, status, updated_at").eq("status", "delivered").gte("updated_at", delivered_cutoff).execute()
+    orders = (pending_orders.data or []) + (delivered_orders.data or [])
     
     pending_skus = {}
     delivered_recently_skus = {}
     
-    if pending_orders.data:
-        for order in pending_orders.data:
+    if orders:
+        for order in orders:
             sku = order["sku"]
             qty = order["quantity"]
             status = order["status"]
@@ -773,8 +1116,8 @@ def step4_check_stock_and_prices():
                     
                     if days_since_delivery <= 7:
                         delivered_recently_skus[sku] = delivered_recently_skus.get(sku, 0) + qty
-                except:
-                    pass
+                except (AttributeError, TypeError, ValueError) as e:
+                    log_event("step4_warning", f"Dată livrare invalidă pentru {sku}: {e}", sku=sku, status="warning")
     
     if pending_skus:
         log_msg = f"Găsite {len(pending_skus)} SKU-uri cu comenzi în tranzit"
@@ -786,14 +1129,17 @@ def step4_check_stock_and_prices():
         st.info(f"✅ {log_msg}")
         log_event("step4_process", log_msg, status="info")
     
-    zero_stock_result = supabase.table("claude_woo_stock").select("*").lte("stock_quantity", 0).execute()
+    # Doar coloanele folosite mai jos, paginat - un singur select se oprea la 1000 de rânduri
+    zero_stock_products = select_all_pages(
+        "claude_woo_stock", "sku, product_id", "sku",
+        filters={"stock_quantity": ("lte", 0)}
+    )
     
-    if not zero_stock_result.data:
+    if not zero_stock_products:
         status_container.success("✅ Nu există produse cu stoc zero!")
         log_event("step4_complete", "Nu există produse cu stoc zero", status="success")
         return 0, 0
     
-    zero_stock_products = zero_stock_result.data
     log_event("step4_process", f"Verificare {len(zero_stock_products)} produse cu stoc zero", status="info")
     
     total_checked = 0
@@ -801,7 +1147,11 @@ def step4_check_stock_and_prices():
     total_skipped_pending = 0
     total_skipped_delivered = 0
     
-    for idx, product_data in enumerate(zero_stock_products):
+    # Colectez întâi toate perechile (produs, foneday_sku), apoi verific la Foneday în paralel
+    candidates = []
+    eligible_products = []
+    
+    for product_data in zero_stock_products:
         my_sku = product_data.get("sku")
         
         if my_sku in pending_skus:
@@ -814,49 +1164,111 @@ def step4_check_stock_and_prices():
             status_container.info(f"⏭️ SKIP {my_sku} - Livrată recent: {delivered_recently_skus[my_sku]} buc")
             continue
         
-        status_container.info(f"🔍 PASUL 4: Verific {idx+1}/{len(zero_stock_products)}: {my_sku}")
-        progress_bar.progress((idx + 1) / len(zero_stock_products))
-        
-        mapping_result = supabase.table("claude_sku_artcode_mapping").select("*").eq(
-            "my_sku", my_sku
-        ).execute()
-        
-        if not mapping_result.data:
-            continue
+        eligible_products.append(product_data)
+    
+    status_container.info(f"🔍 PASUL 4: Citesc mapările pentru {len(eligible_products)} produse...")
+    
+    # Toate mapările într-o singură trecere (în loc de o interogare per SKU)
+    mappings_by_sku = {}
+    mapping_rows = select_in_chunks(
+        "claude_sku_artcode_mapping", "my_sku, foneday_sku", "my_sku",
+        [p.get("sku") for p in eligible_products]
+    )
+    for mapping in mapping_rows:
+        mappings_by_sku.setdefault(mapping["my_sku"], []).append(mapping.get("foneday_sku"))
+    
+    progress_bar.progress(0.3)
+    
+    for product_data in eligible_products:
+        my_sku = product_data.get("sku")
         
-        for mapping in mapping_result.data:
-            foneday_sku = mapping.get("foneday_sku")
-            
+        for foneday_sku in mappings_by_sku.get(my_sku, []):
             if not foneday_sku:
                 continue
             
-            foneday_product = get_foneday_product_by_sku(foneday_sku)
+            candidates.append((product_data, my_sku, foneday_sku))
+    
+    # Catalogul Foneday (Pasul 2) exclude produsele care lipsesc din catalog și, doar dacă e
+    # proaspăt, pe cele indisponibile; restul se verifică live prin API
+    catalog_stock = get_foneday_catalog_stock([foneday_sku for _, _, foneday_sku in candidates])
+    total_before_catalog = len(candidates)
+    candidates = [c for c in candidates if needs_live_check(catalog_stock, c[2])]
+    total_skipped_catalog = total_before_catalog - len(candidates)
+    
+    if total_skipped_catalog:
+        log_event("step4_process", f"{total_skipped_catalog} mapări excluse (lipsă sau indisponibile în catalogul Foneday)", status="info")
+    
+    def on_foneday_progress(done, total):
+        status_container.info(f"🔍 PASUL 4: Verificat la Foneday {done}/{total} ({FONEDAY_MAX_WORKERS} în paralel)")
+        progress_bar.progress(0.3 + 0.7 * done / total)
+    
+    foneday_products = get_foneday_products_by_skus(
+        [foneday_sku for _, _, foneday_sku in candidates],
+        on_progress=on_foneday_progress
+    )
+    
+    # Rândurile de inventar se strâng în memorie (cheie = conflict key) și se salvează la final
+    inventory_rows = {}
+    checked_at = datetime.now().isoformat()
+    
+    for product_data, my_sku, foneday_sku in candidates:
+        foneday_product = foneday_products.get(foneday_sku)
+        
+        if foneday_product:
+            total_checked += 1
             
-            if foneday_product:
-                total_checked += 1
+            if foneday_product.get("instock") == "Y":
+                total_available += 1
                 
-                if foneday_product.get("instock") == "Y":
-                    total_available += 1
-                    
-                    try:
-                        supabase.table("claude_foneday_inventory").upsert({
-                            "product_id": product_data.get("product_id"),
-                            "sku": my_sku,
-                            "foneday_sku": foneday_sku,
-                            "price_eur": float(foneday_product.get("price", 0)),
-                            "instock": True,
-                            "title": foneday_product.get("title"),
-                            "quality": foneday_product.get("quality"),
-                            "last_checked_at": datetime.now().isoformat()
-                        }, on_conflict="sku,foneday_sku").execute()
-                    except: pass
-            
-            time.sleep(0.2)
+                inventory_rows[(my_sku, foneday_sku)] = {
+                    "product_id": product_data.get("product_id"),
+                    "sku": my_sku,
+                    "foneday_sku": foneday_sku,
+                    "price_eur": float(foneday_product.get("price", 0)),
+                    "instock": True,
+                    "title": foneday_product.get("title"),
+                    "quality": foneday_product.get("quality"),
+                    "last_checked_at": checked_at
+                }
+    
+    if inventory_rows:
+        # Se rescriu doar rândurile care diferă de ce e deja în inventar (preț/stoc/titlu/calitate)
+        try:
+            existing_inventory = {
+                (row["sku"], row["foneday_sku"]): (row.get("price_eur"), row.get("instock"), row.get("title"), row.get("quality"))
+                for row in select_in_chunks(
+                    "claude_foneday_inventory", "sku, foneday_sku, price_eur, instock, title, quality", "sku",
+                    [my_sku for my_sku, _ in inventory_rows]
+                )
+            }
+        except Exception as e:
+            log_event("step4_error", f"Eroare citire inventar existent (se salvează tot): {e}", status="error")
+            existing_inventory = {}
+        
+        rows = [
+            row for key, row in inventory_rows.items()
+            if existing_inventory.get(key) != (row["price_eur"], row["instock"], row["title"], row["quality"])
+        ]
+        total_unchanged = len(inventory_rows) - len(rows)
+        
+        status_container.info(f"💾 Salvez {len(rows)} produse disponibile ({total_unchanged} neschimbate)...")
+        log_event("step4_process", f"Inventar: {len(rows)} modificate, {total_unchanged} neschimbate", status="info")
+        batch_size = 500
+        
+        for i in range(0, len(rows), batch_size):
+            try:
+                supabase.table("claude_foneday_inventory").upsert(
+                    rows[i:i+batch_size],
+                    on_conflict="sku,foneday_sku",
+                    returning="minimal"
+                ).execute()
+            except Exception as e:
+                log_event("step4_error", f"Eroare salvare inventar batch {i//batch_size + 1}: {e}", status="error")
     
     progress_bar.progress(1.0)
     status_container.empty()
     
-    success_msg = f"PASUL 4: {total_checked} verificate, {total_available} disponibile, {total_skipped_pending} skip (pending), {total_skipped_delivered} skip (delivered recent)"
+    success_msg = f"PASUL 4: {total_checked} verificate, {total_available} disponibile, {total_skipped_pending} skip (pending), {total_skipped_delivered} skip (delivered recent), {total_skipped_catalog} skip (indisponibile în catalog)"
     log_event("step4_complete", success_msg, status="success")
     
     st.success(f"""
@@ -865,6 +1277,7 @@ def step4_check_stock_and_prices():
     - ✅ {total_available} disponibile pentru comandă
     - ⏭️ {total_skipped_pending} excluse (comandă în tranzit)
     - ⏭️ {total_skipped_delivered} excluse (livrate recent)
+    - ⏭️ {total_skipped_catalog} excluse (indisponibile în catalogul Foneday)
     """)
     
     return total_checked, total_available
@@ -881,64 +1294,115 @@ def step5_add_to_cart():
     
     status_container.info("🛒 PASUL 5: Verific produse profitabile...")
     
-    inventory_result = supabase.table("claude_foneday_inventory").select("*").eq("instock", True).execute()
+    # Filtrele de disponibilitate și preț se aplică direct în Supabase (paginat - nu doar primele 1000)
+    available_products = select_all_pages(
+        "claude_foneday_inventory", "product_id, sku, foneday_sku, price_eur", "sku,foneday_sku",
+        filters={"instock": True, "price_eur": ("gt", 0)}
+    )
+    # O pereche (sku, foneday_sku) intră în coș o singură dată, chiar dacă un rând s-ar repeta între pagini
+    available_products = list({
+        (item.get("sku"), item.get("foneday_sku")): item for item in available_products
+    }.values())
     
-    if not inventory_result.data:
+    if not available_products:
         status_container.info("Nu există produse disponibile la Foneday")
         log_event("step5_complete", "Nu există produse disponibile", status="info")
         return 0, 0
     
-    available_products = inventory_result.data
     log_event("step5_process", f"Procesez {len(available_products)} produse disponibile", status="info")
     
+    # Prețurile WooCommerce pentru toate produsele disponibile, într-o singură trecere
+    woo_prices = {
+        row["sku"]: row.get("regular_price")
+        for row in select_in_chunks(
+            "claude_woo_prices", "sku, regular_price", "sku",
+            [item.get("sku") for item in available_products],
+            filters={"regular_price": ("gt", 0)}
+        )
+    }
+    
     added_to_cart = 0
     not_profitable = 0
+    cart_rows = []
+    cart_batches_saved = 0
     
-    for idx, item in enumerate(available_products):
-        my_sku = item.get("sku")
-        foneday_sku = item.get("foneday_sku")
-        foneday_price = float(item.get("price_eur", 0))
+    def flush_cart_rows():
+        """Istoricul coșului se salvează câte CART_HISTORY_BATCH_SIZE rânduri (un singur insert)"""
+        nonlocal cart_batches_saved
         
-        status_container.info(f"🛒 PASUL 5: Verific {idx+1}/{len(available_products)}: {my_sku}")
-        progress_bar.progress((idx + 1) / len(available_products))
+        if not cart_rows:
+            return
         
-        price_result = supabase.table("claude_woo_prices").select("regular_price").eq("sku", my_sku).execute()
+        cart_batches_saved += 1
+        try:
+            supabase.table("claude_foneday_cart").insert(list(cart_rows), returning="minimal").execute()
+        except Exception as e:
+            log_event("step5_error", f"Eroare salvare coș batch {cart_batches_saved}: {e}", status="error")
+        cart_rows.clear()
+    
+    # Întâi se decide profitabilitatea pentru toate produsele (doar calcul în memorie),
+    # apoi bucla de coș rulează exclusiv pe cele profitabile
+    profitability = calculate_profitability(
+        [item.get("price_eur") for item in available_products],
+        [woo_prices.get(item.get("sku")) for item in available_products]
+    )
+    not_profitable = int((profitability["is_valid"] & ~profitability["is_profitable"]).sum())
+    
+    to_add = [
+        (available_products[i], float(row.foneday_price_eur), float(row.woo_price_ron), float(row.profit_margin))
+        for i, row in profitability[profitability["is_profitable"]].iterrows()
+    ]
+    
+    log_event("step5_process", f"{len(to_add)} profitabile, {not_profitable} neprofitabile", status="info")
+    
+    # Produsele profitabile pleacă în coș câte FONEDAY_CART_CHUNK_SIZE într-un singur POST
+    for start in range(0, len(to_add), FONEDAY_CART_CHUNK_SIZE):
+        chunk = to_add[start:start + FONEDAY_CART_CHUNK_SIZE]
         
-        if not price_result.data:
-            continue
+        status_container.info(f"🛒 PASUL 5: Adaug în coș {start + len(chunk)}/{len(to_add)}")
+        progress_bar.progress((start + len(chunk)) / len(to_add))
         
-        woo_price = float(price_result.data[0].get("regular_price", 0))
+        articles = [
+            {"sku": item.get("foneday_sku"), "quantity": 2, "note": f"Auto-import - {item.get('sku')}"}
+            for item, _, _, _ in chunk
+        ]
+        added_flags, cart_status = add_cart_chunk(articles)
+        added_chunk = [entry for entry, added in zip(chunk, added_flags) if added]
         
-        if woo_price <= 0 or foneday_price <= 0:
-            continue
+        if cart_status in FONEDAY_AUTH_ERRORS:
+            log_event("step5_error", f"Foneday a refuzat accesul la coș (status {cart_status}) - opresc PASUL 5", status="error")
+            st.error(f"❌ Foneday a refuzat accesul la coș (status {cart_status}) - verifică FONEDAY_API_TOKEN")
+            break
         
-        if is_profitable(foneday_price, woo_price):
-            profit_margin = calculate_profit_margin(foneday_price, woo_price)
+        if cart_status is None or cart_status == 429 or cart_status >= 500:
+            log_event("step5_error", f"Lot coș {start + 1}-{start + len(chunk)} eșuat (status {cart_status})", status="error")
+        
+        for item, foneday_price, woo_price, profit_margin in added_chunk:
+            my_sku = item.get("sku")
+            foneday_sku = item.get("foneday_sku")
+            
+            cart_rows.append({
+                "product_id": item.get("product_id"),
+                "sku": my_sku,
+                "foneday_sku": foneday_sku,
+                "quantity": 2,
+                "price_eur": foneday_price,
+                "woo_price_ron": woo_price,
+                "profit_margin": profit_margin,
+                "is_profitable": True,
+                "status": "added_to_cart",
+                "note": f"Profit: {profit_margin}% - 2 buc"
+            })
             
-            cart_result = add_to_foneday_cart(foneday_sku, 2, f"Auto-import - {my_sku}")
+            added_to_cart += 1
+            log_event("step5_add", f"Adăugat: {my_sku} - Profit: {profit_margin}%", sku=my_sku, status="success")
             
-            if cart_result:
-                try:
-                    supabase.table("claude_foneday_cart").insert({
-                        "product_id": item.get("product_id"),
-                        "sku": my_sku,
-                        "foneday_sku": foneday_sku,
-                        "quantity": 2,
-                        "price_eur": foneday_price,
-                        "woo_price_ron": woo_price,
-                        "profit_margin": profit_margin,
-                        "is_profitable": True,
-                        "status": "added_to_cart",
-                        "note": f"Profit: {profit_margin}% - 2 buc"
-                    }).execute()
-                    
-                    added_to_cart += 1
-                    log_event("step5_add", f"Adăugat: {my_sku} - Profit: {profit_margin}%", sku=my_sku, status="success")
-                except: pass
-        else:
-            not_profitable += 1
-        
-        time.sleep(0.1)
+            # Salvare periodică - dacă rularea se întrerupe, istoricul de până acum rămâne
+            if len(cart_rows) >= CART_HISTORY_BATCH_SIZE:
+                flush_cart_rows()
+    
+    flush_cart_rows()
+    get_recent_cart_items.clear()
     
     progress_bar.progress(1.0)
     status_container.empty()
@@ -969,70 +1433,97 @@ def find_high_profit_opportunities(min_profit_percent: float):
     opportunities = []
     
     try:
-        mappings_result = supabase.table("claude_sku_artcode_mapping").select("*").execute()
+        # Toate mapările (paginat - un singur select se oprea la limita de 1000 rânduri a PostgREST)
+        mappings = select_all_pages("claude_sku_artcode_mapping", "my_sku, foneday_sku", "my_sku,foneday_artcode")
         
-        if not mappings_result.data:
+        if not mappings:
             st.warning("Nu există mapări. Rulează mai întâi PASUL 3.")
             return []
         
-        mappings = mappings_result.data
         total_mappings = len(mappings)
         
-        for idx, mapping in enumerate(mappings):
-            my_sku = mapping.get("my_sku")
-            foneday_sku = mapping.get("foneday_sku")
-            
-            status_container.info(f"💰 Verific {idx+1}/{total_mappings}: {my_sku}")
-            progress_bar.progress((idx + 1) / total_mappings)
-            
-            stock_result = supabase.table("claude_woo_stock").select("stock_quantity").eq("sku", my_sku).execute()
-            
-            if not stock_result.data:
-                continue
-            
-            current_stock = stock_result.data[0].get("stock_quantity", 0)
-            
-            if current_stock is None or current_stock <= 0:
-                continue
-            
-            price_result = supabase.table("claude_woo_prices").select("regular_price").eq("sku", my_sku).execute()
-            
-            if not price_result.data:
-                continue
-            
-            woo_price = float(price_result.data[0].get("regular_price", 0))
-            
-            if woo_price <= 0:
-                continue
-            
-            foneday_product = get_foneday_product_by_sku(foneday_sku)
-            
-            if foneday_product and foneday_product.get("instock") == "Y":
-                foneday_price = float(foneday_product.get("price", 0))
-                
-                if foneday_price > 0:
-                    profit_margin = calculate_profit_margin(foneday_price, woo_price)
-                    
-                    if profit_margin >= min_profit_percent:
-                        product_info = get_product_info_from_catalog(my_sku)
-                        product_name = product_info["name"] if product_info else my_sku
-                        
-                        opportunities.append({
-                            "sku": my_sku,
-                            "product_name": product_name,
-                            "foneday_sku": foneday_sku,
-                            "woo_price_ron": woo_price,
-                            "foneday_price_eur": foneday_price,
-                            "profit_margin": profit_margin,
-                            "current_stock": current_stock,
-                            "foneday_title": foneday_product.get("title"),
-                            "quality": foneday_product.get("quality")
-                        })
-                        
-                        log_event("opportunity_found", f"Oportunitate: {my_sku} - Stoc: {current_stock} - Profit: {profit_margin}%", sku=my_sku, status="success")
+        mapped_skus = [mapping.get("my_sku") for mapping in mappings]
+        
+        # Stoc ≥ 1 și preț > 0 se filtrează direct în Supabase - în memorie ajung doar SKU-urile eligibile
+        stock_by_sku = {
+            row["sku"]: row["stock_quantity"]
+            for row in select_in_chunks(
+                "claude_woo_stock", "sku, stock_quantity", "sku", mapped_skus,
+                filters={"stock_quantity": ("gt", 0)}
+            )
+        }
+        woo_prices = {
+            row["sku"]: float(row["regular_price"])
+            for row in select_in_chunks(
+                "claude_woo_prices", "sku, regular_price", "sku", list(stock_by_sku),
+                filters={"regular_price": ("gt", 0)}
+            )
+        }
+        
+        candidates = [
+            (mapping.get("my_sku"), mapping.get("foneday_sku"))
+            for mapping in mappings
+            if mapping.get("my_sku") in stock_by_sku and mapping.get("my_sku") in woo_prices
+        ]
+        
+        # Catalogul Foneday importat la Pasul 2 elimină din start ce lipsește din catalog (și, doar
+        # dacă e proaspăt, ce e indisponibil); restul se verifică live (sursa de adevăr)
+        catalog_stock = get_foneday_catalog_stock([foneday_sku for _, foneday_sku in candidates])
+        candidates = [
+            (my_sku, foneday_sku) for my_sku, foneday_sku in candidates
+            if needs_live_check(catalog_stock, foneday_sku)
+        ]
+        log_event("opportunities_process", f"{len(candidates)}/{total_mappings} mapări de verificat live (stoc, preț, catalog)", status="info")
+        
+        def on_foneday_progress(done, total):
+            status_container.info(f"💰 Verificat la Foneday {done}/{total} ({FONEDAY_MAX_WORKERS} în paralel)")
+            progress_bar.progress(done / total)
+        
+        # Verificările live rulează în paralel (același pool + cache ca la Pasul 4)
+        foneday_products = get_foneday_products_by_skus(
+            [foneday_sku for _, foneday_sku in candidates],
+            on_progress=on_foneday_progress
+        )
+        
+        live = [
+            (my_sku, foneday_sku, foneday_products[foneday_sku])
+            for my_sku, foneday_sku in candidates
+            if foneday_products.get(foneday_sku) and foneday_products[foneday_sku].get("instock") == "Y"
+        ]
+        
+        # Marjele se calculează într-o singură trecere vectorizată; bucla rămâne doar pe oportunități
+        profitability = calculate_profitability(
+            [product.get("price") for _, _, product in live],
+            [woo_prices[my_sku] for my_sku, _, _ in live]
+        )
+        # Sortate o singură dată aici - tabelul, grila de comandă și exportul le primesc deja ordonate
+        selected = profitability[profitability["profit_margin"] >= min_profit_percent].sort_values(
+            "profit_margin", ascending=False
+        )
+        
+        for i, row in selected.iterrows():
+            my_sku, foneday_sku, foneday_product = live[i]
+            current_stock = stock_by_sku[my_sku]
+            profit_margin = float(row.profit_margin)
+            
+            opportunities.append({
+                "sku": my_sku,
+                "product_name": my_sku,  # completat mai jos, cu un singur lookup pentru toate
+                "foneday_sku": foneday_sku,
+                "woo_price_ron": float(row.woo_price_ron),
+                "foneday_price_eur": float(row.foneday_price_eur),
+                "profit_margin": profit_margin,
+                "current_stock": current_stock,
+                "foneday_title": foneday_product.get("title"),
+                "quality": foneday_product.get("quality")
+            })
             
-            if idx % 10 == 0:
-                time.sleep(0.2)
+            log_event("opportunity_found", f"Oportunitate: {my_sku} - Stoc: {current_stock} - Profit: {profit_margin}%", sku=my_sku, status="success")
+        
+        # Numele produselor din catalog - IN-uri pe bucăți, nu 2 interogări per oportunitate
+        product_names = get_product_names_for_skus([opp["sku"] for opp in opportunities])
+        for opp in opportunities:
+            opp["product_name"] = product_names.get(opp["sku"], opp["sku"])
         
         progress_bar.progress(1.0)
         status_container.empty()
@@ -1047,6 +1538,266 @@ def find_high_profit_opportunities(min_profit_percent: float):
         return []
 
 
+# ============ CITIRI CACHE-UITE (evită round-trip la fiecare rerun Streamlit) ============
+@st.cache_data(ttl=60, show_spinner=False)
+def get_dashboard_counts() -> dict:
+    """Numărătorile pentru cardurile din Dashboard (None dacă interogarea eșuează)"""
+    # Tabelele mari folosesc count="estimated": PostgREST dă numărul exact sub pragul
+    # de max-rows și estimarea planner-ului peste el, fără COUNT(*) pe tot tabelul.
+    # Comenzile în așteptare rămân exacte - sunt puține și cifra trebuie să fie corectă.
+    # O singură coloană și limit(1): numărul vine în header-ul Content-Range, fără rândurile propriu-zise
+    queries = {
+        "in_stock": lambda: supabase.table("claude_woo_stock").select("sku", count="estimated").gt("stock_quantity", 0),
+        "zero_stock": lambda: supabase.table("claude_woo_stock").select("sku", count="estimated").lte("stock_quantity", 0),
+        "foneday_products": lambda: supabase.table("claude_foneday_products").select("foneday_sku", count="estimated"),
+        "mappings": lambda: supabase.table("claude_sku_artcode_mapping").select("my_sku", count="estimated"),
+        "pending": lambda: supabase.table("claude_foneday_orders_pending").select("id", count="exact").eq("status", "pending"),
+    }
+    
+    def run_count(key):
+        try:
+            result = queries[key]().limit(1).execute()
+            return result.count if result.count else 0
+        except Exception as e:
+            print(f"Error in get_dashboard_counts ({key}): {e}")
+            return None
+    
+    # Toate numărătorile pleacă simultan - latența e a celei mai lente, nu suma lor
+    with ThreadPoolExecutor(max_workers=len(queries)) as executor:
+        return dict(zip(queries, executor.map(run_count, queries)))
+
+
+LOG_COLUMNS = ["created_at", "event_type", "sku", "message", "status"]
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def get_recent_logs(limit: int) -> list:
+    """Ultimele evenimente din claude_sync_logs (doar coloanele afișate)"""
+    logs = supabase.table("claude_sync_logs").select(
+        ", ".join(LOG_COLUMNS)
+    ).order("created_at", desc=True).limit(limit).execute()
+    return logs.data or []
+
+
+LOG_PAGE_SIZE = 25
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def get_logs_page(page_index: int) -> tuple:
+    """O pagină din claude_sync_logs (cele mai noi primele) + numărul total de rânduri"""
+    start = page_index * LOG_PAGE_SIZE
+    # Tabelul de log crește continuu - numărătoarea estimată ajunge pentru paginare
+    logs = supabase.table("claude_sync_logs").select(
+        ", ".join(LOG_COLUMNS), count="estimated"
+    ).order("created_at", desc=True).range(start, start + LOG_PAGE_SIZE - 1).execute()
+    return logs.data or [], logs.count or 0
+
+
+MAPPING_COLUMNS = ["my_sku", "foneday_artcode", "foneday_sku", "mapping_score", "last_verified_at"]
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def get_recent_mappings(limit: int) -> list:
+    """Ultimele mapări din claude_sku_artcode_mapping (doar coloanele afișate)"""
+    mappings = supabase.table("claude_sku_artcode_mapping").select(
+        ", ".join(MAPPING_COLUMNS)
+    ).order("created_at", desc=True).limit(limit).execute()
+    return mappings.data or []
+
+
+CART_COLUMNS = [
+    "created_at", "sku", "foneday_sku",
+    "quantity", "price_eur", "woo_price_ron",
+    "profit_margin", "is_profitable", "status", "note"
+]
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def get_recent_cart_items(limit: int) -> list:
+    """Ultimele rânduri din claude_foneday_cart (golit după fiecare scriere în coș)"""
+    cart = supabase.table("claude_foneday_cart").select(
+        ", ".join(CART_COLUMNS)
+    ).order("created_at", desc=True).limit(limit).execute()
+    return cart.data or []
+
+
+PENDING_ORDERS_PAGE_SIZE = 25
+PENDING_ORDER_COLUMNS = ["id", "sku", "quantity", "order_date", "expected_delivery_date"]
+ORDER_HISTORY_COLUMNS = ["sku", "quantity", "order_date", "status", "expected_delivery_date", "updated_at"]
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def get_pending_orders(page_index: int) -> tuple:
+    """O pagină din comenzile în tranzit (după data estimată de livrare) + numărul total"""
+    start = page_index * PENDING_ORDERS_PAGE_SIZE
+    pending = supabase.table("claude_foneday_orders_pending").select(
+        ", ".join(PENDING_ORDER_COLUMNS), count="exact"
+    ).eq("status", "pending").order("expected_delivery_date").range(
+        start, start + PENDING_ORDERS_PAGE_SIZE - 1
+    ).execute()
+    return pending.data or [], pending.count or 0
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def get_order_history(limit: int) -> list:
+    """Ultimele comenzi livrate sau anulate"""
+    history = supabase.table("claude_foneday_orders_pending").select(", ".join(ORDER_HISTORY_COLUMNS)).in_("status", ["delivered", "cancelled"]).order("updated_at", desc=True).limit(limit).execute()
+    return history.data or []
+
+
+def clear_order_caches():
+    """Golește citirile cache-uite de coș/comenzi după o scriere"""
+    get_recent_cart_items.clear()
+    get_pending_orders.clear()
+    get_order_history.clear()
+    get_dashboard_counts.clear()
+
+
+ORDER_UPDATE_CHUNK_SIZE = 100
+
+
+def update_orders_status(order_ids: list, status: str):
+    """Schimbă statusul mai multor comenzi - un UPDATE ... IN (...) la fiecare ORDER_UPDATE_CHUNK_SIZE id-uri"""
+    updated_at = datetime.now().isoformat()
+    
+    for start in range(0, len(order_ids), ORDER_UPDATE_CHUNK_SIZE):
+        supabase.table("claude_foneday_orders_pending").update({
+            "status": status,
+            "updated_at": updated_at
+        }).in_("id", order_ids[start:start + ORDER_UPDATE_CHUNK_SIZE]).execute()
+    
+    clear_order_caches()
+
+
+CRITICAL_STOCK_COLUMNS = [
+    "sku", "name", "stock_quantity", "woo_price_ron",
+    "foneday_sku", "foneday_price_eur", "foneday_instock",
+    "profit_margin_percent"
+]
+CRITICAL_STOCK_PAGE_SIZE = 500
+
+
+@st.cache_data(ttl=120, show_spinner=False)
+def get_critical_stock(page_index: int) -> tuple:
+    """O pagină din claude_v_critical_stock + numărul total de rânduri"""
+    start = page_index * CRITICAL_STOCK_PAGE_SIZE
+    result = supabase.table("claude_v_critical_stock").select(
+        ", ".join(CRITICAL_STOCK_COLUMNS), count="exact"
+    ).range(start, start + CRITICAL_STOCK_PAGE_SIZE - 1).execute()
+    return result.data or [], result.count or 0
+
+
+@st.cache_data(show_spinner=False, max_entries=5)
+def opportunities_to_csv(opportunities_df: pd.DataFrame) -> bytes:
+    """CSV-ul pentru export - generat o singură dată per listă de oportunități"""
+    return opportunities_df.to_csv(index=False).encode("utf-8")
+
+
+@st.fragment
+def render_pending_orders():
+    """Tab-ul „În Tranzit” - butoanele de aici re-rulează doar fragmentul, nu toată pagina"""
+    st.markdown("## 🚚 Comenzi în Livrare")
+    
+    pending_page = st.session_state.get("pending_page", 1)
+    pending_data, pending_total = get_pending_orders(pending_page - 1)
+    
+    if not pending_data and pending_page > 1:
+        # Lista s-a micșorat între timp - revenim la prima pagină
+        st.session_state["pending_page"] = 1
+        pending_data, pending_total = get_pending_orders(0)
+    
+    if pending_data:
+        st.info(f"📦 Găsite {pending_total} comenzi în tranzit")
+        
+        # Datele comenzilor se parsează o singură dată, vectorizat, pentru toată pagina
+        order_dates = pd.to_datetime(
+            pd.Series([order.get("order_date") for order in pending_data], dtype=object),
+            format="ISO8601", utc=True, errors="coerce"
+        )
+        
+        pending_df = pd.DataFrame.from_records(pending_data, columns=PENDING_ORDER_COLUMNS)
+        pending_df["order_date"] = order_dates.dt.strftime("%Y-%m-%d").fillna("N/A")
+        pending_df["expected_delivery_date"] = pending_df["expected_delivery_date"].fillna("N/A")
+        # Vechimea în zile calendaristice, ca întreg compact (NA unde data lipsește)
+        pending_df["days_ago"] = (
+            (pd.Timestamp.now(tz="UTC").normalize() - order_dates.dt.normalize()).dt.days
+            .astype("Int16")
+        )
+        pending_df["selected"] = False
+        
+        # Un singur grid în locul unui rând de widget-uri per comandă; selecția e pe pagină
+        pending_editor_key = f"pending_orders_editor_{pending_page}"
+        edited_pending = st.data_editor(
+            pending_df,
+            column_config={
+                "id": None,
+                "sku": st.column_config.TextColumn("SKU"),
+                "quantity": st.column_config.NumberColumn("Cantitate"),
+                "order_date": st.column_config.TextColumn("📅 Comandat"),
+                "expected_delivery_date": st.column_config.TextColumn("🚚 Livrare"),
+                "days_ago": st.column_config.NumberColumn("Vechime", format="%dd"),
+                "selected": st.column_config.CheckboxColumn("Selectează")
+            },
+            disabled=["sku", "quantity", "order_date", "expected_delivery_date", "days_ago"],
+            hide_index=True,
+            num_rows="fixed",
+            use_container_width=True,
+            key=pending_editor_key
+        )
+        
+        selected_orders = [pending_data[i] for i in edited_pending.index[edited_pending["selected"]]]
+        
+        # Se randează doar pagina curentă - numărul de widget-uri nu mai crește cu lista
+        total_pages = (pending_total - 1) // PENDING_ORDERS_PAGE_SIZE + 1
+        if total_pages > 1:
+            st.number_input(
+                f"Pagina (din {total_pages})",
+                min_value=1,
+                max_value=total_pages,
+                step=1,
+                key="pending_page"
+            )
+        
+        st.markdown("---")
+        
+        col_delivered, col_cancel = st.columns(2)
+        
+        # Comenzile bifate se actualizează împreună, cu un singur UPDATE ... IN (...)
+        with col_delivered:
+            if st.button(f"✅ Marchează livrate ({len(selected_orders)})", disabled=not selected_orders, use_container_width=True):
+                try:
+                    update_orders_status([order["id"] for order in selected_orders], "delivered")
+                    # Rândurile se schimbă după update - bifele vechi nu trebuie să rămână pe alte comenzi
+                    st.session_state.pop(pending_editor_key, None)
+                    
+                    for order in selected_orders:
+                        log_event("deliver_order", f"Livrat: {order['sku']}", sku=order['sku'], status="success")
+                    
+                    st.toast(f"Marcate ca livrate: {len(selected_orders)} comenzi", icon="✅")
+                    flush_logs()
+                    st.rerun(scope="fragment")
+                except Exception as e:
+                    st.error(f"Eroare: {e}")
+        
+        with col_cancel:
+            if st.button(f"❌ Anulează selectate ({len(selected_orders)})", disabled=not selected_orders, use_container_width=True):
+                try:
+                    update_orders_status([order["id"] for order in selected_orders], "cancelled")
+                    # Rândurile se schimbă după update - bifele vechi nu trebuie să rămână pe alte comenzi
+                    st.session_state.pop(pending_editor_key, None)
+                    
+                    for order in selected_orders:
+                        log_event("cancel_order", f"Anulat: {order['sku']}", sku=order['sku'], status="warning")
+                    
+                    st.toast(f"Comenzi anulate: {len(selected_orders)}", icon="❌")
+                    flush_logs()
+                    st.rerun(scope="fragment")
+                except Exception as e:
+                    st.error(f"Eroare: {e}")
+    else:
+        st.success("✅ Nu există comenzi în tranzit")
+
+
 # SIDEBAR
 st.sidebar.title("📦 ServicePack")
 st.sidebar.markdown("**Sistem 5 Pași + Oportunități**")
@@ -1070,6 +1821,9 @@ st.sidebar.markdown("---")
 st.sidebar.caption(f"⏰ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
 
 if st.sidebar.button("🔄 Reîmprospătare"):
+    st.cache_data.clear()
+    get_foneday_response_cache().clear()
+    flush_logs()
     st.rerun()
 
 
@@ -1080,57 +1834,45 @@ if page == "🏠 Dashboard":
     
     st.markdown("### 📈 Statistici Generale")
     
+    counts = get_dashboard_counts()
+    
+    def show_count(label, value):
+        st.metric(label, value if value is not None else "N/A")
+    
     col1, col2, col3, col4, col5 = st.columns(5)
     
     with col1:
-        try:
-            stock_count = supabase.table("claude_woo_stock").select("*", count="exact").gt("stock_quantity", 0).execute()
-            st.metric("✅ Cu Stoc", stock_count.count if stock_count.count else 0)
-        except:
-            st.metric("✅ Cu Stoc", "N/A")
+        show_count("✅ Cu Stoc", counts["in_stock"])
     
     with col2:
-        try:
-            zero_count = supabase.table("claude_woo_stock").select("*", count="exact").lte("stock_quantity", 0).execute()
-            st.metric("❌ Stoc Zero", zero_count.count if zero_count.count else 0)
-        except:
-            st.metric("❌ Stoc Zero", "N/A")
+        show_count("❌ Stoc Zero", counts["zero_stock"])
     
     with col3:
-        try:
-            foneday_count = supabase.table("claude_foneday_products").select("*", count="exact").execute()
-            st.metric("🌐 Produse Foneday", foneday_count.count if foneday_count.count else 0)
-        except:
-            st.metric("🌐 Produse Foneday", "N/A")
+        show_count("🌐 Produse Foneday", counts["foneday_products"])
     
     with col4:
-        try:
-            mapping_count = supabase.table("claude_sku_artcode_mapping").select("*", count="exact").execute()
-            st.metric("🗺️ Mapări SKU", mapping_count.count if mapping_count.count else 0)
-        except:
-            st.metric("🗺️ Mapări SKU", "N/A")
+        show_count("🗺️ Mapări SKU", counts["mappings"])
     
     with col5:
-        try:
-            pending_count = supabase.table("claude_foneday_orders_pending").select("*", count="exact").eq("status", "pending").execute()
-            st.metric("🚚 În Tranzit", pending_count.count if pending_count.count else 0)
-        except:
-            st.metric("🚚 În Tranzit", "N/A")
+        show_count("🚚 În Tranzit", counts["pending"])
     
     st.markdown("---")
     
     st.markdown("### 🕐 Ultimele Sincronizări")
     
     try:
-        logs = supabase.table("claude_sync_logs").select("*").order("created_at", desc=True).limit(10).execute()
+        logs_data = get_recent_logs(10)
         
-        if logs.data:
-            df = pd.DataFrame(logs.data)
-            df["created_at"] = pd.to_datetime(df["created_at"]).dt.strftime("%Y-%m-%d %H:%M:%S")
+        if logs_data:
+            df = pd.DataFrame.from_records(logs_data, columns=["created_at", "event_type", "message", "status"])
+            df["created_at"] = pd.to_datetime(df["created_at"], format="ISO8601", cache=True)
             st.dataframe(
-                df[["created_at", "event_type", "message", "status"]],
+                df,
                 use_container_width=True,
-                height=300
+                height=300,
+                column_config={
+                    "created_at": st.column_config.DatetimeColumn(format="YYYY-MM-DD HH:mm:ss")
+                }
             )
         else:
             st.info("Nu există log-uri")
@@ -1148,12 +1890,13 @@ elif page == "🔄 Import Individual (Pași)":
         **Ce face:**
         - Citește TOATE produsele din WooCommerce prin API (toate paginile)
         - Extrage: SKU, stoc, preț, ID produs
-        - **FORȚEAZĂ sincronizare completă** (UPSERT batch) - NU mai verifică dacă s-a schimbat ceva
-        - Salvează în batch-uri de 500 produse (rapid, fără timeout)
+        - Compară cu ce e deja salvat și scrie **DOAR produsele noi sau modificate** (stoc, preț, ID)
+        - Salvează pagină cu pagină (UPSERT per pagină de 100 produse WooCommerce)
         
         **Rezultat:** 
-        - Tabele `claude_woo_stock` și `claude_woo_prices` **COMPLET ACTUALIZATE**
-        - TOATE produsele au `last_sync_at` = astăzi
+        - Tabele `claude_woo_stock` și `claude_woo_prices` **ACTUALIZATE**
+        - Doar produsele modificate primesc `last_sync_at` = astăzi; cele neschimbate își păstrează data veche (nu e o eroare de sincronizare)
+        - Numărul de produse neschimbate apare în raportul final
         
         **Când:** **ZILNIC** sau când modifici ceva în WooCommerce
         
@@ -1196,10 +1939,12 @@ elif page == "🔄 Import Individual (Pași)":
         - Găsește produsele tale cu stoc zero (din `claude_woo_stock`)
         - **EXCLUDE produse cu comenzi în tranzit** (status="pending")
         - **EXCLUDE produse livrate recent** (ultimele 7 zile) - evită dubla comandă
+        - **EXCLUDE produse care lipsesc** din catalogul Foneday importat la Pasul 2 (și pe cele indisponibile, doar dacă importul e din ultimele minute)
         - Pentru fiecare produs rămas: verifică prin API Foneday (timp real) dacă e disponibil
-        - Salvează în `claude_foneday_inventory` produsele disponibile
+        - Salvează în `claude_foneday_inventory` produsele disponibile - **DOAR cele noi sau modificate** (preț, stoc, titlu, calitate)
         
         **Rezultat:** Știi exact ce produse cu stoc 0 poți reaproviziona (fără duplicate)
+        - Doar rândurile rescrise primesc `last_checked_at` = acum; cele neschimbate își păstrează data veche, deși au fost verificate (nu e o eroare)
         
         **Când:** **ZILNIC** pentru reaprovizionare (DUPĂ PASUL 1!)
         
@@ -1379,10 +2124,11 @@ elif page == "💰 Oportunități Profit":
         if opportunities:
             st.success(f"🎉 Găsite {len(opportunities)} oportunități de profit ≥{min_profit}% (produse cu stoc)!")
             
-            st.session_state['opportunities'] = opportunities
-            
+            # Lista se păstrează direct ca DataFrame - rerun-urile nu o mai reconstruiesc din dict-uri
             df = pd.DataFrame(opportunities)
-            df = df.sort_values("profit_margin", ascending=False)
+            st.session_state['opportunities_df'] = df
+            # Cantitățile introduse pentru lista anterioară nu se mai aplică
+            st.session_state.pop('opportunities_editor', None)
             
             st.dataframe(
                 df[[
@@ -1414,56 +2160,36 @@ elif page == "💰 Oportunități Profit":
             st.warning(f"Nu s-au găsit oportunități cu stoc ≥1 și profit ≥{min_profit}%")
             st.info("💡 Sugestii:\n- Încearcă o marjă mai mică\n- Asigură-te că ai rulat PASUL 2 (Import Foneday) și PASUL 3 (Mapare)\n- Produsele cu stoc 0 sunt procesate în Pașii 4-5")
     
-    if 'opportunities' in st.session_state and st.session_state['opportunities']:
+    if 'opportunities_df' in st.session_state and not st.session_state['opportunities_df'].empty:
         st.markdown("---")
         st.markdown("## 🛒 Comandă Produse Selectate")
         
         st.info("💡 Completează cantitatea dorită pentru fiecare produs. Produsele cu cantitate 0 sau goală nu vor fi comandate.")
         
-        opportunities = st.session_state['opportunities']
-        
-        quantities = {}
+        opportunities_df = st.session_state['opportunities_df']
+        
+        # Un singur grid editabil în locul unui rând de widget-uri per oportunitate
+        order_df = opportunities_df[["sku", "product_name", "profit_margin", "current_stock", "foneday_price_eur"]].copy()
+        order_df["quantity"] = 0
+        
+        edited_df = st.data_editor(
+            order_df,
+            column_config={
+                "sku": st.column_config.TextColumn("SKU"),
+                "product_name": st.column_config.TextColumn("Produs"),
+                "profit_margin": st.column_config.NumberColumn("Profit %", format="%.1f%%"),
+                "current_stock": st.column_config.NumberColumn("Stoc Actual"),
+                "foneday_price_eur": st.column_config.NumberColumn("Preț EUR", format="€%.2f"),
+                "quantity": st.column_config.NumberColumn("Cantitate", min_value=0, max_value=100, step=1)
+            },
+            disabled=["sku", "product_name", "profit_margin", "current_stock", "foneday_price_eur"],
+            hide_index=True,
+            num_rows="fixed",
+            use_container_width=True,
+            key="opportunities_editor"
+        )
         
-        col1, col2, col3, col4, col5, col6 = st.columns([2, 2, 1, 1, 1, 1])
-        with col1:
-            st.markdown("**SKU**")
-        with col2:
-            st.markdown("**Produs**")
-        with col3:
-            st.markdown("**Profit %**")
-        with col4:
-            st.markdown("**Stoc Actual**")
-        with col5:
-            st.markdown("**Preț EUR**")
-        with col6:
-            st.markdown("**Cantitate**")
-        
-        st.markdown("---")
-        
-        for idx, opp in enumerate(opportunities):
-            col1, col2, col3, col4, col5, col6 = st.columns([2, 2, 1, 1, 1, 1])
-            
-            with col1:
-                st.text(opp["sku"])
-            with col2:
-                st.text(opp["product_name"][:30] + "..." if len(opp["product_name"]) > 30 else opp["product_name"])
-            with col3:
-                st.text(f"{opp['profit_margin']:.1f}%")
-            with col4:
-                st.text(str(opp["current_stock"]))
-            with col5:
-                st.text(f"€{opp['foneday_price_eur']:.2f}")
-            with col6:
-                qty = st.number_input(
-                    "Qty",
-                    min_value=0,
-                    max_value=100,
-                    value=0,
-                    step=1,
-                    key=f"qty_{idx}",
-                    label_visibility="collapsed"
-                )
-                quantities[idx] = qty
+        quantities = edited_df["quantity"].fillna(0).astype(int)
         
         st.markdown("---")
         
@@ -1472,13 +2198,11 @@ elif page == "💰 Oportunități Profit":
         with col2:
             if st.button("🛒 PLASEAZĂ COMANDA", type="primary", use_container_width=True):
                 
-                to_order = []
-                for idx, qty in quantities.items():
-                    if qty > 0:
-                        to_order.append({
-                            "opportunity": opportunities[idx],
-                            "quantity": qty
-                        })
+                selected_qty = quantities[quantities > 0]
+                to_order = [
+                    {"opportunity": opp, "quantity": int(qty)}
+                    for opp, qty in zip(opportunities_df.loc[selected_qty.index].to_dict("records"), selected_qty)
+                ]
                 
                 if not to_order:
                     st.warning("⚠️ Nu ai selectat nicio cantitate! Completează cantitățile mai întâi.")
@@ -1491,38 +2215,64 @@ elif page == "💰 Oportunități Profit":
                     progress_bar_order = st.progress(0)
                     status_order = st.empty()
                     
-                    for idx, item in enumerate(to_order):
-                        opp = item["opportunity"]
-                        qty = item["quantity"]
+                    # Istoricul coșului se scrie cu un singur INSERT după ce trec toate POST-urile
+                    cart_rows = []
+                    ordered = []
+                    
+                    # Produsele pleacă în coș câte FONEDAY_CART_CHUNK_SIZE într-un singur POST
+                    for start in range(0, len(to_order), FONEDAY_CART_CHUNK_SIZE):
+                        chunk = to_order[start:start + FONEDAY_CART_CHUNK_SIZE]
                         
-                        status_order.info(f"🛒 Comand {idx+1}/{len(to_order)}: {opp['sku']} × {qty}")
-                        progress_bar_order.progress((idx + 1) / len(to_order))
+                        status_order.info(f"🛒 Comand {start + len(chunk)}/{len(to_order)} produse...")
+                        progress_bar_order.progress((start + len(chunk)) / len(to_order))
                         
-                        cart_result = add_to_foneday_cart(opp["foneday_sku"], qty, f"Oportunitate profit {opp['profit_margin']:.1f}% - {opp['sku']}")
+                        added_flags, cart_status = add_cart_chunk([
+                            {
+                                "sku": item["opportunity"]["foneday_sku"],
+                                "quantity": item["quantity"],
+                                "note": f"Oportunitate profit {item['opportunity']['profit_margin']:.1f}% - {item['opportunity']['sku']}"
+                            }
+                            for item in chunk
+                        ])
                         
-                        if cart_result:
-                            try:
-                                supabase.table("claude_foneday_cart").insert({
-                                    "product_id": None,
-                                    "sku": opp["sku"],
-                                    "foneday_sku": opp["foneday_sku"],
-                                    "quantity": qty,
-                                    "price_eur": opp["foneday_price_eur"],
-                                    "woo_price_ron": opp["woo_price_ron"],
-                                    "profit_margin": opp["profit_margin"],
-                                    "is_profitable": True,
-                                    "status": "added_to_cart",
-                                    "note": f"Oportunitate - Profit: {opp['profit_margin']:.1f}% - {qty} buc"
-                                }).execute()
-                                
-                                success_count += 1
-                                log_event("opportunity_order", f"Comandat: {opp['sku']} × {qty} - Profit: {opp['profit_margin']:.1f}%", sku=opp['sku'], status="success")
-                            except Exception as e:
-                                error_count += 1
-                        else:
-                            error_count += 1
+                        if cart_status in FONEDAY_AUTH_ERRORS:
+                            log_event("opportunity_order_error", f"Foneday a refuzat accesul la coș (status {cart_status})", status="error")
+                            st.error(f"❌ Foneday a refuzat accesul la coș (status {cart_status}) - verifică FONEDAY_API_TOKEN")
+                            error_count += len(to_order) - start
+                            break
                         
-                        time.sleep(0.2)
+                        for item, added in zip(chunk, added_flags):
+                            opp = item["opportunity"]
+                            qty = item["quantity"]
+                            
+                            if not added:
+                                error_count += 1
+                                continue
+                            
+                            cart_rows.append({
+                                "product_id": None,
+                                "sku": opp["sku"],
+                                "foneday_sku": opp["foneday_sku"],
+                                "quantity": qty,
+                                "price_eur": opp["foneday_price_eur"],
+                                "woo_price_ron": opp["woo_price_ron"],
+                                "profit_margin": opp["profit_margin"],
+                                "is_profitable": True,
+                                "status": "added_to_cart",
+                                "note": f"Oportunitate - Profit: {opp['profit_margin']:.1f}% - {qty} buc"
+                            })
+                            ordered.append((opp, qty))
+                    
+                    if cart_rows:
+                        try:
+                            supabase.table("claude_foneday_cart").insert(cart_rows, returning="minimal").execute()
+                            get_recent_cart_items.clear()
+                            success_count = len(cart_rows)
+                            for opp, qty in ordered:
+                                log_event("opportunity_order", f"Comandat: {opp['sku']} × {qty} - Profit: {opp['profit_margin']:.1f}%", sku=opp['sku'], status="success")
+                        except Exception as e:
+                            error_count += len(cart_rows)
+                            log_event("opportunity_order_error", f"Eroare salvare istoric coș ({len(cart_rows)} produse): {e}", status="error")
                     
                     progress_bar_order.progress(1.0)
                     status_order.empty()
@@ -1536,8 +2286,7 @@ elif page == "💰 Oportunități Profit":
         st.markdown("---")
         
         if st.button("📥 Exportă Lista (CSV)"):
-            df = pd.DataFrame(opportunities)
-            csv = df.to_csv(index=False)
+            csv = opportunities_to_csv(opportunities_df)
             st.download_button(
                 label="⬇️ Descarcă CSV",
                 data=csv,
@@ -1550,22 +2299,34 @@ elif page == "📊 Stocuri Critice":
     st.title("⚠️ Produse cu Stoc Zero")
     
     try:
-        critical = supabase.table("claude_v_critical_stock").select("*").execute()
+        critical_page = st.session_state.get("critical_page", 1)
+        critical_rows, critical_total = get_critical_stock(critical_page - 1)
         
-        if critical.data and len(critical.data) > 0:
-            df = pd.DataFrame(critical.data)
+        if not critical_rows and critical_page > 1:
+            # Lista s-a micșorat între timp - revenim la prima pagină
+            st.session_state["critical_page"] = 1
+            critical_rows, critical_total = get_critical_stock(0)
+        
+        if critical_total > 0:
+            df = pd.DataFrame.from_records(critical_rows, columns=CRITICAL_STOCK_COLUMNS)
             
-            st.metric("📊 Total Produse Stoc Zero", len(df))
+            st.metric("📊 Total Produse Stoc Zero", critical_total)
             
             st.dataframe(
-                df[[
-                    "sku", "name", "stock_quantity", "woo_price_ron",
-                    "foneday_sku", "foneday_price_eur", "foneday_instock",
-                    "profit_margin_percent"
-                ]],
+                df,
                 use_container_width=True,
                 height=500
             )
+            
+            total_pages = (critical_total - 1) // CRITICAL_STOCK_PAGE_SIZE + 1
+            if total_pages > 1:
+                st.number_input(
+                    f"Pagina (din {total_pages})",
+                    min_value=1,
+                    max_value=total_pages,
+                    step=1,
+                    key="critical_page"
+                )
         else:
             st.success("✅ Nu există produse cu stoc zero!")
     except Exception as e:
@@ -1576,17 +2337,13 @@ elif page == "🛒 Coș Foneday":
     st.title("🛒 Produse în Coșul Foneday")
     
     try:
-        cart = supabase.table("claude_foneday_cart").select("*").order("created_at", desc=True).limit(200).execute()
+        cart_data = get_recent_cart_items(200)
         
-        if cart.data and len(cart.data) > 0:
-            df = pd.DataFrame(cart.data)
+        if cart_data:
+            df = pd.DataFrame.from_records(cart_data, columns=CART_COLUMNS)
             
             st.dataframe(
-                df[[
-                    "created_at", "sku", "foneday_sku",
-                    "quantity", "price_eur", "woo_price_ron",
-                    "profit_margin", "is_profitable", "status", "note"
-                ]],
+                df,
                 use_container_width=True,
                 height=500
             )
@@ -1638,10 +2395,11 @@ elif page == "🚚 Comenzi în Tranzit":
                 try:
                     supabase.table("claude_foneday_cart").delete().eq("status", "added_to_cart").execute()
                     supabase.table("claude_foneday_orders_pending").delete().eq("status", "pending").execute()
-                    st.success("✅ Toate comenzile au fost șterse!")
+                    clear_order_caches()
+                    st.toast("Toate comenzile au fost șterse!", icon="✅")
                     log_event("clear_orders", "Toate comenzile au fost șterse", status="warning")
                     st.session_state['confirm_clear_orders'] = False
-                    time.sleep(1)
+                    flush_logs()
                     st.rerun()
                 except Exception as e:
                     st.error(f"Eroare: {e}")
@@ -1651,17 +2409,28 @@ elif page == "🚚 Comenzi în Tranzit":
     
     st.markdown("---")
     
+    # Coșul se citește în fundal cât timp istoricul (cache-uit) se citește în thread-ul principal.
+    # Comenzile în tranzit le citește fragmentul lor, care se re-rulează separat.
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        cart_future = executor.submit(
+            lambda: supabase.table("claude_foneday_cart").select(
+                "id, created_at, sku, foneday_sku, quantity, price_eur, profit_margin, note"
+            ).eq("status", "added_to_cart").order("created_at", desc=True).execute()
+        )
+        history_data = get_order_history(50)
+        cart = cart_future.result()
+    
     tab1, tab2, tab3 = st.tabs(["🛒 Coș de Confirmat", "🚚 În Tranzit", "📦 Istoric"])
     
     with tab1:
         st.markdown("## 🛒 Produse din Coș - De Confirmat")
         
-        cart = supabase.table("claude_foneday_cart").select("*").eq("status", "added_to_cart").order("created_at", desc=True).execute()
         
         if cart.data and len(cart.data) > 0:
             st.info(f"📊 Găsite {len(cart.data)} produse în coș de confirmat")
             
-            for idx, item in enumerate(cart.data):
+            # Cheile widget-urilor urmează id-ul din coș, nu poziția în listă
+            for item in cart.data:
                 col1, col2, col3, col4 = st.columns([3, 1, 1, 2])
                 
                 with col1:
@@ -1674,12 +2443,12 @@ elif page == "🚚 Comenzi în Tranzit":
                     expected_delivery = st.date_input(
                         "Livrare",
                         value=datetime.now() + timedelta(days=4),
-                        key=f"delivery_{idx}",
+                        key=f"delivery_{item['id']}",
                         label_visibility="collapsed"
                     )
                 
                 with col4:
-                    if st.button("✅ Confirmă Comandă", key=f"confirm_{idx}", use_container_width=True):
+                    if st.button("✅ Confirmă Comandă", key=f"confirm_{item['id']}", use_container_width=True):
                         try:
                             supabase.table("claude_foneday_orders_pending").insert({
                                 "sku": item["sku"],
@@ -1696,11 +2465,12 @@ elif page == "🚚 Comenzi în Tranzit":
                             supabase.table("claude_foneday_cart").update({
                                 "status": "confirmed"
                             }).eq("id", item["id"]).execute()
+                            clear_order_caches()
                             
                             log_event("confirm_order", f"Confirmat: {item['sku']} × {item['quantity']}", sku=item['sku'], status="success")
                             
-                            st.success(f"✅ Comanda confirmată: {item['sku']} × {item['quantity']}")
-                            time.sleep(1)
+                            st.toast(f"Comanda confirmată: {item['sku']} × {item['quantity']}", icon="✅")
+                            flush_logs()
                             st.rerun()
                         except Exception as e:
                             st.error(f"Eroare: {e}")
@@ -1708,108 +2478,28 @@ elif page == "🚚 Comenzi în Tranzit":
             st.info("Coșul e gol - nu există comenzi de confirmat")
     
     with tab2:
-        st.markdown("## 🚚 Comenzi în Livrare")
-        
-        pending = supabase.table("claude_foneday_orders_pending").select("*").eq("status", "pending").order("expected_delivery_date").execute()
-        
-        if pending.data and len(pending.data) > 0:
-            st.info(f"📦 Găsite {len(pending.data)} comenzi în tranzit")
-            
-            for idx, order in enumerate(pending.data):
-                col1, col2, col3, col4, col5 = st.columns([2, 1, 1, 1, 2])
-                
-                with col1:
-                    st.text(f"{order['sku']} × {order['quantity']}")
-                
-                with col2:
-                    try:
-                        if order.get('order_date'):
-                            if isinstance(order['order_date'], str):
-                                order_dt = datetime.fromisoformat(order['order_date'].replace('Z', '+00:00'))
-                            else:
-                                order_dt = order['order_date']
-                            order_date_str = order_dt.strftime('%Y-%m-%d')
-                        else:
-                            order_date_str = "N/A"
-                    except Exception:
-                        order_date_str = "N/A"
-                    
-                    st.text(f"📅 {order_date_str}")
-                
-                with col3:
-                    if order.get('expected_delivery_date'):
-                        st.text(f"🚚 {order['expected_delivery_date']}")
-                    else:
-                        st.text("🚚 N/A")
-                
-                with col4:
-                    try:
-                        if order.get('order_date'):
-                            if isinstance(order['order_date'], str):
-                                order_dt = datetime.fromisoformat(order['order_date'].replace('Z', '+00:00'))
-                            else:
-                                order_dt = order['order_date']
-                            
-                            if order_dt.tzinfo is not None:
-                                now_dt = datetime.now(order_dt.tzinfo)
-                            else:
-                                now_dt = datetime.now()
-                            
-                            days_ago = (now_dt - order_dt).days
-                            st.text(f"{days_ago}d")
-                        else:
-                            st.text("N/A")
-                    except Exception as e:
-                        st.text("N/A")
-                
-                with col5:
-                    col_delivered, col_cancel = st.columns(2)
-                    
-                    with col_delivered:
-                        if st.button("✅ Livrat", key=f"deliver_{idx}", use_container_width=True):
-                            try:
-                                supabase.table("claude_foneday_orders_pending").update({
-                                    "status": "delivered",
-                                    "updated_at": datetime.now().isoformat()
-                                }).eq("id", order["id"]).execute()
-                                
-                                log_event("deliver_order", f"Livrat: {order['sku']}", sku=order['sku'], status="success")
-                                
-                                st.success(f"✅ Marcat ca livrat: {order['sku']}")
-                                time.sleep(1)
-                                st.rerun()
-                            except Exception as e:
-                                st.error(f"Eroare: {e}")
-                    
-                    with col_cancel:
-                        if st.button("❌ Anulează", key=f"cancel_{idx}", use_container_width=True):
-                            try:
-                                supabase.table("claude_foneday_orders_pending").update({
-                                    "status": "cancelled",
-                                    "updated_at": datetime.now().isoformat()
-                                }).eq("id", order["id"]).execute()
-                                
-                                log_event("cancel_order", f"Anulat: {order['sku']}", sku=order['sku'], status="warning")
-                                
-                                st.warning(f"❌ Comandă anulată: {order['sku']}")
-                                time.sleep(1)
-                                st.rerun()
-                            except Exception as e:
-                                st.error(f"Eroare: {e}")
-        else:
-            st.success("✅ Nu există comenzi în tranzit")
+        render_pending_orders()
     
     with tab3:
         st.markdown("## 📦 Istoric Comenzi")
         
-        history = supabase.table("claude_foneday_orders_pending").select("*").in_("status", ["delivered", "cancelled"]).order("updated_at", desc=True).limit(50).execute()
-        
-        if history.data:
-            df = pd.DataFrame(history.data)
+        if history_data:
+            df = pd.DataFrame.from_records(history_data, columns=ORDER_HISTORY_COLUMNS)
+            # Tipuri compacte - payload Arrow mai mic către browser
+            df["quantity"] = pd.to_numeric(df["quantity"], errors="coerce", downcast="integer")
+            df["status"] = df["status"].astype("category")
+            # Datele rămân datetime64 - formatarea se face în browser
+            for col in ("order_date", "expected_delivery_date", "updated_at"):
+                df[col] = pd.to_datetime(df[col], format="ISO8601", errors="coerce")
             st.dataframe(
-                df[["sku", "quantity", "order_date", "status", "expected_delivery_date", "updated_at"]],
+                df,
                 use_container_width=True,
-                height=400
+                height=400,
+                column_config={
+                    "order_date": st.column_config.DatetimeColumn(format="YYYY-MM-DD HH:mm"),
+                    "expected_delivery_date": st.column_config.DateColumn(format="YYYY-MM-DD"),
+                    "updated_at": st.column_config.DatetimeColumn(format="YYYY-MM-DD HH:mm:ss")
+                }
             )
         else:
             st.info("Nu există istoric")
@@ -1819,15 +2509,16 @@ elif page == "🗺️ Mapări":
     st.title("🗺️ Mapări SKU → artcode")
     
     try:
-        mappings = supabase.table("claude_sku_artcode_mapping").select("*").order("created_at", desc=True).limit(500).execute()
+        mappings_data = get_recent_mappings(500)
         
-        if mappings.data and len(mappings.data) > 0:
-            df = pd.DataFrame(mappings.data)
+        if mappings_data:
+            df = pd.DataFrame.from_records(mappings_data, columns=MAPPING_COLUMNS)
+            df["mapping_score"] = pd.to_numeric(df["mapping_score"], errors="coerce", downcast="integer")
             
             st.metric("🗺️ Total Mapări", len(df))
             
             st.dataframe(
-                df[["my_sku", "foneday_artcode", "foneday_sku", "mapping_score", "last_verified_at"]],
+                df,
                 use_container_width=True,
                 height=500
             )
@@ -1841,16 +2532,39 @@ elif page == "📝 Log":
     st.title("📝 Istoric Log")
     
     try:
-        logs = supabase.table("claude_sync_logs").select("*").order("created_at", desc=True).limit(200).execute()
-        
-        if logs.data:
-            df = pd.DataFrame(logs.data)
-            df["created_at"] = pd.to_datetime(df["created_at"]).dt.strftime("%Y-%m-%d %H:%M:%S")
+        log_page = st.session_state.get("log_page", 1)
+        logs_data, logs_total = get_logs_page(log_page - 1)
+        
+        if not logs_data and log_page > 1:
+            # Pagina cerută nu mai există (estimare depășită) - revenim la prima pagină
+            st.session_state["log_page"] = 1
+            logs_data, logs_total = get_logs_page(0)
+        
+        if logs_data:
+            st.caption(f"📊 ~{logs_total} evenimente în total")
+            df = pd.DataFrame.from_records(logs_data, columns=LOG_COLUMNS)
+            df["event_type"] = df["event_type"].astype("category")
+            df["status"] = df["status"].astype("category")
+            df["created_at"] = pd.to_datetime(df["created_at"], format="ISO8601", cache=True)
             st.dataframe(
-                df[["created_at", "event_type", "sku", "message", "status"]],
+                df,
                 use_container_width=True,
-                height=500
+                height=500,
+                column_config={
+                    "created_at": st.column_config.DatetimeColumn(format="YYYY-MM-DD HH:mm:ss")
+                }
             )
+            
+            # Doar pagina curentă ajunge în browser
+            total_pages = max(1, (logs_total - 1) // LOG_PAGE_SIZE + 1)
+            if total_pages > 1:
+                st.number_input(
+                    f"Pagina (din {total_pages})",
+                    min_value=1,
+                    max_value=total_pages,
+                    step=1,
+                    key="log_page"
+                )
         else:
             st.info("Nu există log-uri")
     except Exception as e:
@@ -1860,3 +2574,6 @@ elif page == "📝 Log":
 st.sidebar.markdown("---")
 st.sidebar.caption("📦 ServicePack v5.0")
 st.sidebar.caption("UPSERT batch + Log detaliat + Fix timeout")
+
+# Evenimentele rămase în buffer la finalul rulării
+flush_logs()